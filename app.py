@@ -1,74 +1,147 @@
 import os
-from flask import Flask, request, render_template, jsonify
-import cv2
-import numpy as np
-import copy
+import time
+
+from startup import StartupReport
+
+# 启动耗时从这里开始计算，包括下面各依赖的导入
+startup = StartupReport('app')
+
+from flask import Flask, Response, request, render_template, jsonify
+
+from metrics import CONTENT_TYPE, ServiceMetrics
+from solution_cache import SolutionCache, solve_with_cache
+from solve_service import check_conflicts
+from solver_tables import precompute_tables, tables_from_env
+from sudoku_solver import SolveStats, SolveTimeout, SudokuSolver, budget_from_env
+from upload_store import UploadStore
+
+startup.mark('imports')
 
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 最大16MB
+# 上传的图片默认只在内存中处理；设置 PERSIST_UPLOADS=1 时按内容哈希保存到 UPLOAD_FOLDER，
+# 目录总大小不超过 UPLOAD_STORE_MAX_BYTES
+app.config['PERSIST_UPLOADS'] = os.environ.get('PERSIST_UPLOADS', '0') == '1'
+app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploads')
+app.config['UPLOAD_STORE_MAX_BYTES'] = int(os.environ.get('UPLOAD_STORE_MAX_BYTES', 256 * 1024 * 1024))
+# 解缓存容量，以及可选的 sqlite 后备文件路径
+app.config['SOLUTION_CACHE_SIZE'] = int(os.environ.get('SOLUTION_CACHE_SIZE', 4096))
+app.config['SOLUTION_CACHE_PATH'] = os.environ.get('SOLUTION_CACHE_PATH')
+
+# 单次求解的时间（秒）和节点预算
+app.config['SOLVE_TIME_LIMIT'] = budget_from_env()['time_limit']
+app.config['SOLVE_MAX_NODES'] = budget_from_env()['max_nodes']
+# 是否默认在响应中返回求解统计（表单字段 stats=1 也可以单独开启）
+app.config['SOLVE_STATS'] = os.environ.get('SOLVE_STATS') == '1'
 
-# 确保上传目录存在
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-class SudokuSolver:
-    @staticmethod
-    def is_valid(board, row, col, num):
-        """检查在给定位置放置数字是否有效"""
-        # 检查行
-        for i in range(9):
-            if board[row][i] == num:
-                return False
-        
-        # 检查列
-        for i in range(9):
-            if board[i][col] == num:
-                return False
-        
-        # 检查3x3子网格
-        start_row = row - row % 3
-        start_col = col - col % 3
-        for i in range(3):
-            for j in range(3):
-                if board[i + start_row][j + start_col] == num:
-                    return False
-        
-        return True
-
-    @staticmethod
-    def solve_sudoku(board):
-        """使用回溯算法解决数独"""
-        for i in range(9):
-            for j in range(9):
-                if board[i][j] == 0:
-                    for num in range(1, 10):
-                        if SudokuSolver.is_valid(board, i, j, num):
-                            board[i][j] = num
-                            if SudokuSolver.solve_sudoku(board):
-                                return True
-                            board[i][j] = 0
-                    return False
-        return True
-
-def extract_sudoku_from_image(image_path):
+solution_cache = SolutionCache(app.config['SOLUTION_CACHE_SIZE'], app.config['SOLUTION_CACHE_PATH'])
+
+# /metrics 暴露的运行指标（进程内统计，抓取时才合并）
+metrics = ServiceMetrics(solution_cache.stats)
+
+upload_store = None
+if app.config['PERSIST_UPLOADS']:
+    upload_store = UploadStore(app.config['UPLOAD_FOLDER'], app.config['UPLOAD_STORE_MAX_BYTES'])
+startup.mark('app')
+
+# 预先构建各尺寸的求解器下标表（设置 SOLVER_TABLES_PATH 时从快照载入）
+precompute_tables(**tables_from_env())
+startup.mark('solver_tables')
+metrics.startup_report(startup)
+startup.finish()
+
+def extract_sudoku_from_images(datas):
     """
-    从图像中提取数独题目
-    当前为占位实现，返回示例数独
+    从多张图像文件的字节中提取数独题目，所有图片的格子合并为一次批量识别
+    返回与 datas 等长的列表，每项为 {'board': 题目, 'timings': 各阶段耗时（毫秒）}
+    或 {'error': 错误信息}
     """
-    # 这里应该实现图像处理和数字识别逻辑
-    # 目前返回示例数独作为演示
-    sample_sudoku = [
-        [5, 3, 0, 0, 7, 0, 0, 0, 0],
-        [6, 0, 0, 1, 9, 5, 0, 0, 0],
-        [0, 9, 8, 0, 0, 0, 0, 6, 0],
-        [8, 0, 0, 0, 6, 0, 0, 0, 3],
-        [4, 0, 0, 8, 0, 3, 0, 0, 1],
-        [7, 0, 0, 0, 2, 0, 0, 0, 6],
-        [0, 6, 0, 0, 0, 0, 2, 8, 0],
-        [0, 0, 0, 4, 1, 9, 0, 0, 5],
-        [0, 0, 0, 0, 8, 0, 0, 7, 9]
-    ]
-    return sample_sudoku
+    # OpenCV 和 NumPy 的导入需要一百多毫秒，只在第一次上传图片时才加载，不拖慢服务启动
+    from image_pipeline import decode_image, extract_grids
+
+    results = [None] * len(datas)
+    images = []
+    decoded = []
+    for i, data in enumerate(datas):
+        start = time.perf_counter()
+        try:
+            images.append(decode_image(data))
+        except ValueError as e:
+            results[i] = {'error': str(e)}
+            continue
+        decoded.append((i, round((time.perf_counter() - start) * 1000, 3)))
+
+    for (i, decode_ms), result in zip(decoded, extract_grids(images)):
+        if 'timings' in result:
+            result['timings'] = dict(decode=decode_ms, **result['timings'])
+        results[i] = result
+    return results
+
+def upload_status(response):
+    """单张图片的处理结果，用作 /metrics 中请求计数的 status 标签"""
+    if 'error' in response:
+        return 'error'
+    if response.get('status') in ('timeout', 'invalid'):
+        return response['status']
+    return 'solved' if response['solved'] else 'no_solution'
+
+def solve_extracted(original_sudoku, timings, unique_check, with_stats=False):
+    """求解识别出的题目，返回 /upload 的响应内容"""
+    # 解决数独（优先从缓存中取解）
+    solver = SudokuSolver()
+    budget = {'time_limit': app.config['SOLVE_TIME_LIMIT'], 'max_nodes': app.config['SOLVE_MAX_NODES']}
+    stats = SolveStats() if with_stats else None
+    # 识别错误常常产生重复的数字，这种题目不必进入搜索，直接返回冲突的格子
+    invalid = check_conflicts(original_sudoku)
+    if invalid is not None:
+        return {
+            'original': original_sudoku,
+            'solved': [],
+            'message': '识别出的题目中有互相冲突的数字',
+            'status': 'invalid',
+            'reason': invalid['reason'],
+            'conflicts': invalid['conflicts'],
+            'timings': timings
+        }
+    try:
+        solved_sudoku = solve_with_cache(original_sudoku, solver, solution_cache, stats=stats, **budget)
+    except SolveTimeout as e:
+        return {
+            'original': original_sudoku,
+            'solved': [],
+            'message': '求解超时',
+            'status': 'timeout',
+            'stats': stats.as_dict() if stats else e.stats(),
+            'timings': timings
+        }
+    if solved_sudoku is None:
+        response = {
+            'original': original_sudoku,
+            'solved': [],
+            'message': '该数独无解',
+            'timings': timings
+        }
+    else:
+        response = {
+            'original': original_sudoku,
+            'solved': solved_sudoku,
+            'message': '数独已成功求解',
+            'timings': timings
+        }
+    if unique_check and solved_sudoku is not None:
+        # 唯一性检查：数到2个解即可判断
+        try:
+            response['unique'] = solver.count_solutions(original_sudoku, limit=2, stats=stats, **budget) == 1
+        except SolveTimeout as e:
+            response['status'] = 'timeout'
+            response['stats'] = stats.as_dict() if stats else e.stats()
+            response['message'] = '数独已求解，但唯一性检查超时'
+            return response
+        if not response['unique']:
+            response['message'] = '数独已求解，但该题目不止一个解'
+    if stats is not None:
+        response['stats'] = stats.as_dict()
+    return response
 
 @app.route('/')
 def index():
@@ -77,45 +150,61 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """处理文件上传"""
+    """
+    处理文件上传
+    上传单个文件时返回该题目的结果；同时上传多个 file 字段时，
+    所有图片一次批量识别，返回 {'results': [...]}
+    """
+    start = time.perf_counter()
     # 检查是否有文件被上传
-    if 'file' not in request.files:
+    files = [file for file in request.files.getlist('file') if file.filename != '']
+    if not files:
+        metrics.observe_request('/upload', 'invalid', time.perf_counter() - start)
         return jsonify({'error': '没有选择文件'}), 400
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': '没有选择文件'}), 400
+    # 直接在内存中读取上传的文件，不写临时文件
+    datas = [file.read() for file in files]
     
-    if file:
-        # 保存上传的文件
-        filename = file.filename
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
-        try:
-            # 从图像中提取数独
-            original_sudoku = extract_sudoku_from_image(file_path)
-            
-            # 创建要解决的数独副本
-            solved_sudoku = copy.deepcopy(original_sudoku)
-            
-            # 解决数独
-            solver = SudokuSolver()
-            if solver.solve_sudoku(solved_sudoku):
-                # 返回JSON响应
-                return jsonify({
-                    'original': original_sudoku,
-                    'solved': solved_sudoku,
-                    'message': '数独已成功求解'
-                })
+    unique_check = request.form.get('mode') == 'unique'
+    with_stats = request.form.get('stats', '1' if app.config['SOLVE_STATS'] else '0') == '1'
+    try:
+        if upload_store is not None:
+            for data in datas:
+                upload_store.save(data)
+        # 从图像中提取数独并求解
+        responses = []
+        for result in extract_sudoku_from_images(datas):
+            if 'error' in result:
+                responses.append({'error': f'处理图像时出错: {result["error"]}'})
             else:
-                return jsonify({
-                    'original': original_sudoku,
-                    'solved': [],
-                    'message': '该数独无解'
-                })
-        except Exception as e:
-            return jsonify({'error': f'处理图像时出错: {str(e)}'}), 500
+                metrics.observe_timings(result['timings'])
+                solve_start = time.perf_counter()
+                responses.append(solve_extracted(result['board'], result['timings'], unique_check, with_stats))
+                metrics.solve_seconds.observe(time.perf_counter() - solve_start, 'backtracking')
+    except Exception as e:
+        metrics.observe_request('/upload', 'error', time.perf_counter() - start)
+        return jsonify({'error': f'处理图像时出错: {str(e)}'}), 500
+
+    # 请求数按图片计（多图上传时每张图片各计一次），耗时按整个请求计
+    for response in responses:
+        metrics.requests.inc('/upload', upload_status(response))
+    metrics.request_seconds.observe(time.perf_counter() - start, '/upload')
+
+    if len(responses) == 1:
+        if 'error' in responses[0]:
+            return jsonify(responses[0]), 500
+        return jsonify(responses[0])
+    return jsonify({'results': responses})
+
+@app.route('/cache/stats')
+def cache_stats():
+    """解缓存的命中统计"""
+    return jsonify(solution_cache.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 文本格式的运行指标"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=False)
\ No newline at end of file
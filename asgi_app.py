@@ -0,0 +1,450 @@
+"""
+ASGI 生产入口
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port $PORT
+
+事件循环只负责收发请求，CPU 密集的求解都在有界的进程池中执行，一个慢题目不会阻塞其他请求。
+/solve、/solve/batch、/generate 的请求和响应格式与 web_app.py 完全相同（共用 solve_service 和 batch_solver）。
+
+- 在途请求（排队中 + 求解中）达到 SOLVE_QUEUE_LIMIT 时立即返回 503 和 Retry-After，不会无限排队
+- /healthz 为存活检查；/readyz 为就绪检查，进程池已启动且队列未满时返回 200，否则返回 503
+- 每个工作进程有自己的解缓存（设置 SOLUTION_CACHE_PATH 时共用同一个 sqlite 文件），
+  /cache/stats 汇总各工作进程随结果上报的最新统计
+- /metrics 为 Prometheus 文本格式的指标；求解耗时和缓存统计在工作进程中测得，随结果返回后由主进程记录，
+  抓取只读取主进程内的数据，不会向进程池提交任务
+- 并行搜索的 /solve（请求中 "parallel": true，或设置 SOLVE_PARALLEL=1 默认开启）由主进程的一个线程协调，
+  子树全部提交到同一个进程池；这类请求使用主进程自己的解缓存，统计同样汇总在 /cache/stats 中
+
+进程池本身已经利用了多核，因此 uvicorn 只需要运行一个 worker，并发能力通过 SOLVE_WORKERS 调整。
+"""
+import os
+import time
+
+from startup import StartupReport
+
+# 启动耗时从这里开始计算，包括下面各依赖的导入；lifespan 启动完进程池后输出报告
+startup = StartupReport('asgi_app')
+
+import asyncio
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs
+
+from batch_solver import is_puzzle, read_ndjson, solve_one
+from metrics import CONTENT_TYPE, ServiceMetrics, pool_queue_depth
+from parallel_solver import ParallelSolver
+from puzzle_generator import CHUNK_SIZES, generate_chunk, plan_chunks
+from solution_cache import SolutionCache
+from solve_service import (conflict_response, generate_response, parse_generate_request, solve_request,
+                           validate_solve_request)
+from solver_tables import precompute_tables, tables_from_env
+from sudoku_solver import SOLVER_NAMES, budget_from_env
+
+startup.mark('imports')
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+# 静态页面，与 web_app.py 的 / 和 /test 相同
+PAGES = {'/': 'sudoku.html', '/test': 'test.html'}
+
+# 工作进程内的状态，由 _init_worker 在进程启动时初始化
+_worker_cache = None
+_worker_budget = None
+_worker_stats = False
+
+
+def _init_worker(cache_size, cache_path, budget, with_stats, tables):
+    global _worker_cache, _worker_budget, _worker_stats
+    # fork 出的进程已经继承了主进程构建好的表，这里只在其他启动方式下才需要真正构建
+    precompute_tables(**tables)
+    _worker_cache = SolutionCache(cache_size, cache_path)
+    _worker_budget = budget
+    _worker_stats = with_stats
+
+
+def _worker_ping():
+    return os.getpid()
+
+
+def _worker_solve(data):
+    """在工作进程中处理 /solve，返回 (状态码, 响应, 求解耗时（秒）, 进程号, 该进程的缓存统计)"""
+    start = time.perf_counter()
+    try:
+        status, response = 200, solve_request(data, _worker_cache, _worker_budget, _worker_stats)
+    except Exception as e:
+        status, response = 500, {'error': f'Error solving puzzle: {str(e)}'}
+    return status, response, time.perf_counter() - start, os.getpid(), _worker_cache.stats()
+
+
+def merge_cache_stats(snapshots):
+    """合并多个工作进程的缓存统计"""
+    merged = {'size': 0, 'maxsize': 0, 'hits': 0, 'misses': 0, 'disk_hits': 0}
+    for stats in snapshots:
+        for key in merged:
+            merged[key] += stats[key]
+    total = merged['hits'] + merged['misses']
+    merged['hit_ratio'] = merged['hits'] / total if total else 0.0
+    merged['workers'] = len(snapshots)
+    return merged
+
+
+async def _read_body(receive, limit):
+    """读取完整的请求体，超过 limit 字节时返回 None"""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError('客户端已断开')
+        body += message.get('body', b'')
+        if len(body) > limit:
+            return None
+        if not message.get('more_body'):
+            return bytes(body)
+
+
+async def _send_response(send, status, body, content_type=b'application/json', headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status, payload, headers=()):
+    await _send_response(send, status, json.dumps(payload).encode(), headers=headers)
+
+
+class SolveApp:
+    """ASGI 应用：路由、准入控制和进程池管理"""
+
+    def __init__(self):
+        budget = budget_from_env()
+        self.workers = int(os.environ.get('SOLVE_WORKERS', os.cpu_count() or 1))
+        # 允许的在途请求数，默认为进程数的4倍
+        self.queue_limit = int(os.environ.get('SOLVE_QUEUE_LIMIT', self.workers * 4))
+        self.max_body = int(os.environ.get('SOLVE_MAX_BODY', 64 * 1024))
+        self.max_batch_body = int(os.environ.get('SOLVE_MAX_BATCH_BODY', 16 * 1024 * 1024))
+        self.generate_max_count = int(os.environ.get('GENERATE_MAX_COUNT', 1000))
+        self.generate_time_limit = float(os.environ.get('GENERATE_TIME_LIMIT', 10)) or None
+        self.budget = {'time_limit': budget['time_limit'], 'max_nodes': budget['max_nodes']}
+        self.with_stats = os.environ.get('SOLVE_STATS') == '1'
+        self.parallel = os.environ.get('SOLVE_PARALLEL') == '1'
+        self.cache_size = int(os.environ.get('SOLUTION_CACHE_SIZE', 4096))
+        self.cache_path = os.environ.get('SOLUTION_CACHE_PATH')
+        self.tables = tables_from_env()
+        self.executor = None
+        # 并行搜索请求在主进程中使用的解缓存，第一次用到时创建
+        self.parallel_cache = None
+        self.ready = False
+        self.in_flight = 0
+        self.cache_stats = {}
+        self._pages = {}
+        self.metrics = ServiceMetrics(lambda: merge_cache_stats(list(self.cache_stats.values())))
+        self.metrics.gauge('sudoku_in_flight_requests', 'Admitted requests queued or being solved',
+                           lambda: self.in_flight)
+        self.metrics.gauge('sudoku_queue_limit', 'Admission limit for in-flight requests',
+                           lambda: self.queue_limit)
+        self.metrics.gauge('sudoku_pool_queue_depth', 'Tasks submitted to the worker pool and not yet finished',
+                           lambda: pool_queue_depth(self.executor))
+        self.metrics.startup_report(startup)
+
+    # ---- 进程池 ----
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.cache_size, self.cache_path, self.budget, self.with_stats, self.tables),
+            )
+        return self.executor
+
+    def restart_executor(self):
+        """工作进程异常退出后进程池不可再用，丢弃后按需重建"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.executor = None
+        self.cache_stats.clear()
+
+    async def startup(self):
+        # 预先启动全部工作进程，避免第一批请求承担进程启动的开销
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _worker_ping) for _ in range(self.workers)))
+        self.ready = True
+        if 'workers' not in startup.phases:
+            startup.mark('workers')
+            startup.finish()
+
+    def shutdown(self):
+        self.ready = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def solve_parallel(self, data):
+        """
+        在主进程的线程中处理并行搜索的 /solve，返回值与 _worker_solve 相同。
+        第一个节点起就交给进程池，主进程只做协调，不与事件循环争抢 CPU
+        """
+        if self.parallel_cache is None:
+            self.parallel_cache = SolutionCache(self.cache_size, self.cache_path)
+        start = time.perf_counter()
+        solver = ParallelSolver(self.get_executor(), self.workers, local_nodes=0)
+        try:
+            status, response = 200, solve_request(data, self.parallel_cache, self.budget, self.with_stats, solver)
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            status, response = 500, {'error': f'Error solving puzzle: {str(e)}'}
+        return status, response, time.perf_counter() - start, os.getpid(), self.parallel_cache.stats()
+
+    def admit(self):
+        """准入控制：在途请求未达上限时占用一个名额并返回 True"""
+        if self.in_flight >= self.queue_limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    # ---- ASGI ----
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        path, method = scope['path'], scope['method']
+        try:
+            if path == '/solve' and method == 'POST':
+                await self._solve(receive, send)
+            elif path == '/solve/batch' and method == 'POST':
+                await self._solve_batch(scope, receive, send)
+            elif path == '/generate' and method == 'GET':
+                await self._generate(scope, send)
+            elif path == '/cache/stats' and method == 'GET':
+                await _send_json(send, 200, merge_cache_stats(list(self.cache_stats.values())))
+            elif path == '/metrics' and method == 'GET':
+                await _send_response(send, 200, self.metrics.render().encode(), CONTENT_TYPE.encode())
+            elif path == '/healthz':
+                await _send_json(send, 200, {'status': 'ok'})
+            elif path == '/readyz':
+                await self._readyz(send)
+            elif path in PAGES and method == 'GET':
+                await _send_response(send, 200, self._page(PAGES[path]), b'text/html; charset=utf-8')
+            elif path in PAGES or path in ('/solve', '/solve/batch', '/generate', '/cache/stats', '/metrics'):
+                await _send_json(send, 405, {'error': 'Method not allowed'})
+            else:
+                await _send_json(send, 404, {'error': 'Not found'})
+        except ConnectionError:
+            pass
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _page(self, name):
+        if name not in self._pages:
+            with open(os.path.join(TEMPLATE_DIR, name), 'rb') as f:
+                self._pages[name] = f.read()
+        return self._pages[name]
+
+    async def _readyz(self, send):
+        ready = self.ready and self.executor is not None and self.in_flight < self.queue_limit
+        payload = {'status': 'ready' if ready else 'not_ready',
+                   'in_flight': self.in_flight, 'queue_limit': self.queue_limit}
+        await _send_json(send, 200 if ready else 503, payload)
+
+    async def _busy(self, send):
+        await _send_json(send, 503, {'error': 'Server busy, retry later'}, headers=[(b'retry-after', b'1')])
+
+    async def _solve(self, receive, send):
+        start = time.perf_counter()
+        status = await self._handle_solve(receive, send)
+        self.metrics.observe_request('/solve', status, time.perf_counter() - start)
+
+    async def _handle_solve(self, receive, send):
+        """处理 /solve，返回用作指标标签的结果状态"""
+        body = await _read_body(receive, self.max_body)
+        if body is None:
+            await _send_json(send, 413, {'error': 'Request too large'})
+            return 'too_large'
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        error = validate_solve_request(data)
+        if error:
+            await _send_json(send, 400, {'error': error})
+            return 'invalid'
+        # 矛盾的题目只需一次线性扫描，直接在事件循环中返回，不占用准入名额和工作进程
+        response = conflict_response(data, self.with_stats)
+        if response is not None:
+            await _send_json(send, 200, response)
+            return 'invalid'
+        if not self.admit():
+            await self._busy(send)
+            return 'busy'
+
+        loop = asyncio.get_running_loop()
+        try:
+            if data.get('parallel', self.parallel) and data.get('solver', 'backtracking') == 'backtracking':
+                # 协调线程大部分时间在等待子树的结果，使用事件循环默认的线程池（DLX 不支持并行，仍在工作进程中求解）
+                status, response, elapsed, pid, cache_stats = await loop.run_in_executor(
+                    None, self.solve_parallel, data)
+            else:
+                status, response, elapsed, pid, cache_stats = await loop.run_in_executor(
+                    self.get_executor(), _worker_solve, data)
+        except BrokenProcessPool:
+            self.restart_executor()
+            await self._busy(send)
+            return 'busy'
+        finally:
+            self.in_flight -= 1
+        self.cache_stats[pid] = cache_stats
+        if status == 200:
+            self.metrics.solve_seconds.observe(elapsed, data.get('solver', 'backtracking'))
+        await _send_json(send, status, response)
+        return response.get('status', 'error')
+
+    async def _generate(self, scope, send):
+        start = time.perf_counter()
+        status = await self._handle_generate(scope, send)
+        self.metrics.observe_request('/generate', status, time.perf_counter() - start)
+
+    async def _handle_generate(self, scope, send):
+        """
+        与 web_app.py 的 /generate 相同，占用一个准入名额。各块题目在进程池中生成，
+        同时最多占用一半的工作进程，其余进程继续处理 /solve；超出 GENERATE_TIME_LIMIT 时返回 503
+        """
+        query = {key: values[0] for key, values in parse_qs(scope['query_string'].decode()).items()}
+        error, params = parse_generate_request(query, self.generate_max_count)
+        if error:
+            await _send_json(send, 400, {'error': error})
+            return 'invalid'
+        if not self.admit():
+            await self._busy(send)
+            return 'busy'
+
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        difficulty = params['difficulty']
+        chunks = plan_chunks(params['count'], params['seed'], chunk_size=CHUNK_SIZES[difficulty])
+        deadline = time.time() + self.generate_time_limit if self.generate_time_limit else None
+        pending = deque()
+        puzzles = []
+        try:
+            for n, seed in chunks:
+                pending.append(loop.run_in_executor(executor, generate_chunk, difficulty, n, seed, 1, deadline))
+                if len(pending) >= max(1, self.workers // 2):
+                    puzzles.extend(await pending.popleft())
+            while pending:
+                puzzles.extend(await pending.popleft())
+        except BrokenProcessPool:
+            self.restart_executor()
+            await self._busy(send)
+            return 'busy'
+        except RuntimeError as e:
+            await _send_json(send, 503, {'error': f'Puzzle generation failed: {str(e)}'})
+            return 'failed'
+        finally:
+            for future in pending:
+                future.cancel()
+            self.in_flight -= 1
+        await _send_json(send, 200, generate_response(params['difficulty'], puzzles))
+        return 'generated'
+
+    async def _solve_batch(self, scope, receive, send):
+        start = time.perf_counter()
+        status = await self._handle_batch(scope, receive, send)
+        self.metrics.observe_request('/solve/batch', status, time.perf_counter() - start)
+
+    async def _handle_batch(self, scope, receive, send):
+        """与 web_app.py 的 /solve/batch 相同：JSON 或 NDJSON 输入，按输入顺序流式返回 NDJSON"""
+        body = await _read_body(receive, self.max_batch_body)
+        if body is None:
+            await _send_json(send, 413, {'error': 'Request too large'})
+            return 'too_large'
+        headers = dict(scope['headers'])
+        content_type = headers.get(b'content-type', b'').split(b';')[0].strip()
+        if content_type == b'application/x-ndjson':
+            query = parse_qs(scope['query_string'].decode())
+            puzzles = list(read_ndjson(body.splitlines()))
+            solver_name = query.get('solver', ['backtracking'])[0]
+            with_stats = query.get('stats', ['1' if self.with_stats else '0'])[0] == '1'
+        else:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict) or not isinstance(data.get('puzzles'), list):
+                await _send_json(send, 400, {'error': 'Invalid request data'})
+                return 'invalid'
+            puzzles = data['puzzles']
+            solver_name = data.get('solver', 'backtracking')
+            with_stats = bool(data.get('stats', self.with_stats))
+        if solver_name not in SOLVER_NAMES:
+            await _send_json(send, 400, {'error': f'Unknown solver: {solver_name}'})
+            return 'invalid'
+        # 一个批量请求占用一个准入名额，内部最多同时提交 2 倍进程数的题目
+        if not self.admit():
+            await self._busy(send)
+            return 'busy'
+
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/x-ndjson')]})
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        pending = deque()
+        status = 'error'
+        try:
+            for index, puzzle in enumerate(puzzles):
+                if is_puzzle(puzzle):
+                    future = loop.run_in_executor(executor, solve_one, puzzle, solver_name,
+                                                  self.budget['time_limit'], self.budget['max_nodes'], with_stats)
+                    pending.append((index, future))
+                else:
+                    pending.append((index, {'error': 'Invalid puzzle format'}))
+                while len(pending) >= self.workers * 2:
+                    await self._send_batch_item(send, pending.popleft(), solver_name)
+            while pending:
+                await self._send_batch_item(send, pending.popleft(), solver_name)
+            status = 'completed'
+        except BrokenProcessPool:
+            self.restart_executor()
+        finally:
+            for _, item in pending:
+                if isinstance(item, asyncio.Future):
+                    item.cancel()
+            self.in_flight -= 1
+        await send({'type': 'http.response.body', 'body': b''})
+        return status
+
+    async def _send_batch_item(self, send, item, solver_name):
+        index, result = item
+        if not isinstance(result, dict):
+            result = await result
+        self.metrics.observe_batch_result(result, solver_name)
+        result['index'] = index
+        await send({'type': 'http.response.body', 'body': json.dumps(result).encode() + b'\n', 'more_body': True})
+
+
+app = SolveApp()
+startup.mark('app')
+
+# 在创建进程池之前构建求解器下标表，fork 出的工作进程直接继承（设置 SOLVER_TABLES_PATH 时从快照载入）
+precompute_tables(**app.tables)
+startup.mark('solver_tables')
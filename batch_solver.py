@@ -0,0 +1,85 @@
+"""
+批量求解
+
+把大量题目分发到进程池中求解，并按输入顺序逐个产出结果。
+工作函数定义在模块顶层，以便 ProcessPoolExecutor 可以序列化。
+"""
+import json
+import time
+from collections import deque
+
+from solve_service import check_conflicts, is_board
+from sudoku_solver import SolveStats, SolveTimeout, get_solver
+
+
+def is_puzzle(puzzle):
+    """检查是否为 9x9、数字在 0..9 之间的整数列表（批量求解只支持标准数独）"""
+    return is_board(puzzle) and len(puzzle) == 9
+
+
+def read_ndjson(lines):
+    """逐行解析 NDJSON 请求体，每行是一个题目或 {"puzzle": ...}，无法解析的行产出 None"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield item.get('puzzle') if isinstance(item, dict) else item
+
+
+def solve_one(puzzle, solver_name='backtracking', time_limit=None, max_nodes=None, with_stats=False):
+    """
+    求解单个题目，返回与 /solve 相同的 status 以及耗时（毫秒）。
+    with_stats 为 True 时结果中附带求解统计
+    """
+    start = time.perf_counter()
+    stats = SolveStats() if with_stats else None
+    try:
+        invalid = check_conflicts(puzzle)
+        if invalid is not None:
+            invalid['time_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            return invalid
+        solution = get_solver(solver_name).solve(puzzle, time_limit=time_limit, max_nodes=max_nodes, stats=stats)
+    except SolveTimeout as e:
+        return {'solution': [], 'status': 'timeout', 'stats': stats.as_dict() if stats else e.stats(),
+                'time_ms': round((time.perf_counter() - start) * 1000, 3)}
+    except ValueError as e:
+        return {'error': str(e), 'time_ms': round((time.perf_counter() - start) * 1000, 3)}
+    elapsed = round((time.perf_counter() - start) * 1000, 3)
+    if solution is not None:
+        result = {'solution': solution, 'status': 'solved', 'time_ms': elapsed}
+    else:
+        result = {'solution': [], 'status': 'no_solution', 'time_ms': elapsed}
+    if stats is not None:
+        result['stats'] = stats.as_dict()
+    return result
+
+
+def iter_solve(puzzles, executor, solver_name='backtracking', time_limit=None, max_nodes=None, window=256,
+               with_stats=False):
+    """
+    按输入顺序产出 (序号, 结果)。
+    最多同时提交 window 个任务，因此 puzzles 可以是惰性的流式输入。
+    格式不正确的题目不会提交到进程池，直接返回错误。
+    """
+    pending = deque()
+    for index, puzzle in enumerate(puzzles):
+        if is_puzzle(puzzle):
+            pending.append((index, executor.submit(solve_one, puzzle, solver_name, time_limit, max_nodes, with_stats)))
+        else:
+            pending.append((index, {'error': 'Invalid puzzle format'}))
+        while len(pending) >= window:
+            yield _pop_result(pending)
+    while pending:
+        yield _pop_result(pending)
+
+
+def _pop_result(pending):
+    index, item = pending.popleft()
+    if isinstance(item, dict):
+        return index, item
+    return index, item.result()
@@ -0,0 +1,435 @@
+"""
+求解器基准测试与性能回归检查
+
+生成（或从文件载入）分档题库：easy、hard、17-clue、unsolvable、multi-solution，
+以及 4x4、16x16、25x25 三种其他尺寸的随机题目（numpy 后端只支持 9x9，跳过这几档），
+对每个求解后端逐档运行，报告吞吐量（题/秒）、p50/p99 延迟和峰值内存（tracemalloc），
+并把结果写成 JSON，以便在版本之间比较、在部署前发现性能退化。
+
+用法::
+
+    python benchmark.py --count 50 --output bench.json
+    python benchmark.py --corpus corpus.json --compare bench.json   # 吞吐量下降超过阈值时退出码为1
+    python benchmark.py --puzzle-file hard.sdk --limit 100000       # 二进制题库（见 puzzle_format）
+    python benchmark.py --tiers hard 16x16 --backends backtracking parallel   # 对比并行搜索的尾延迟
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from numpy_batch_solver import UNIT_CELLS, solve_batch
+from parallel_solver import ParallelSolver
+from puzzle_format import _DECODE, open_puzzle_file, parse_lines
+from puzzle_generator import EASY_CLUES, format_puzzle, random_solution, shuffle
+from sudoku_solver import PEERS, SOLVER_NAMES, SolveTimeout, SudokuSolver, geometry_for_cells, get_solver
+
+# 其他尺寸的档位：宫格边长和保留的数字比例。
+# 大盘面上保持唯一解地挖数太慢，这几档是完整盘面随机挖去数字得到的（不保证唯一解，但一定有解）；
+# 25x25 在一半左右的数字时正处于难度陡增的区间，搜索时间波动极大，因此保留 55%
+SIZE_TIERS = {
+    '4x4': (2, 0.5),
+    '16x16': (4, 0.4),
+    '25x25': (5, 0.55),
+}
+TIERS = ('easy', 'hard', '17-clue', 'unsolvable', 'multi-solution') + tuple(SIZE_TIERS)
+# numpy 后端整档一次求解，只报告吞吐量，没有单题延迟
+BACKENDS = SOLVER_NAMES + ('numpy',)
+# 需要显式指定的后端：parallel 为进程池上的并行搜索（ParallelSolver），进程数为 CPU 核数。
+# 它用多个核换单题延迟，吞吐量不能和单进程后端直接比较，因此不在默认列表中
+EXTRA_BACKENDS = ('parallel',)
+
+# 公认的高难度题目，生成 hard 档时对它们做随机对称变换
+HARD_SEEDS = (
+    '8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..',
+    '1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..',
+    '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1',
+    '..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9',
+)
+# 17个已给数字的唯一解题目（已知的最少提示数）
+SEVENTEEN_SEEDS = (
+    '000000010400000000020000000000050407008000300001090000300400200050100000000806000',
+    '000000010400000000020000000000050604008000300001090000300400200050100000000807000',
+    '000000012000035000000600070700000300000400800100000000000120000080000040050000600',
+    '000000012003600000000007000410020000000500300700000600280000040000300500000000000',
+    '000000012008030000000000040120500000000004700060000000507000300000620000000100000',
+    '000000012040050000000009000070600400000100000000000050000087500601000300200000000',
+    '000000012050400000000000030700600400001000000000080000920000800000510700000003000',
+)
+DIGITS = np.arange(1, 10, dtype=np.uint8)
+# 二进制题库每次解包的题目数
+FILE_CHUNK_SIZE = 65536
+
+
+def parse_puzzle(line):
+    """N² 个字符（'.' 或 '0' 表示空格，10-25 为 A-P，标准数独为 81 个）-> N² 字节的扁平盘面"""
+    line = line.strip()
+    cells = line.upper().encode().translate(_DECODE)
+    try:
+        n = geometry_for_cells(len(cells)).n
+    except ValueError:
+        n = 0
+    if not n or max(cells) > n:
+        raise ValueError(f'无效的题目: {line[:81]}')
+    return cells
+
+
+def _dig(solution, clues, rng):
+    """从完整盘面随机挖去数字，保持唯一解，直到剩下 clues 个数字或无法再挖"""
+    cells = bytearray(solution)
+    remaining = 81
+    for idx in rng.sample(range(81), 81):
+        if remaining <= clues:
+            break
+        value, cells[idx] = cells[idx], 0
+        if SudokuSolver.count_solutions_cells(cells, limit=2)[0] == 1:
+            remaining -= 1
+        else:
+            cells[idx] = value
+    return bytes(cells)
+
+
+def _unsolvable(rng):
+    """在唯一解题目的某个空格填入与唯一解不同、但不与已给数字冲突的数字，题目必然无解"""
+    solution = random_solution(rng)
+    cells = bytearray(_dig(solution, EASY_CLUES, rng))
+    empties = [idx for idx in range(81) if not cells[idx]]
+    rng.shuffle(empties)
+    for idx in empties:
+        for d in rng.sample(range(1, 10), 9):
+            if d != solution[idx] and all(cells[p] != d for p in PEERS[idx]):
+                cells[idx] = d
+                return bytes(cells)
+    raise RuntimeError('无法构造无解题目')
+
+
+def _multi_solution(rng):
+    """从唯一解题目中继续随机删去已给数字，直到出现多个解"""
+    cells = bytearray(shuffle(rng.choice(HARD_CELLS), rng))
+    givens = [idx for idx in range(81) if cells[idx]]
+    rng.shuffle(givens)
+    for idx in givens:
+        cells[idx] = 0
+        if SudokuSolver.count_solutions_cells(cells, limit=2)[0] >= 2:
+            break
+    return bytes(cells)
+
+
+def _size_puzzle(box, keep, rng):
+    """随机完整盘面保留 keep 比例的数字，用于其他尺寸的档位"""
+    cells = bytearray(random_solution(rng, box))
+    for idx in rng.sample(range(len(cells)), len(cells) - round(len(cells) * keep)):
+        cells[idx] = 0
+    return bytes(cells)
+
+
+HARD_CELLS = [parse_puzzle(p) for p in HARD_SEEDS]
+
+
+def generate_corpus(count, seed=0, tiers=TIERS):
+    """生成分档题库，返回 {档位: [题目字符串, ...]}，同一 seed 的结果相同"""
+    rng = random.Random(seed)
+    corpus = {}
+    for tier in tiers:
+        if tier == 'easy':
+            puzzles = [_dig(random_solution(rng), EASY_CLUES, rng) for _ in range(count)]
+        elif tier == 'hard':
+            puzzles = [shuffle(rng.choice(HARD_CELLS), rng) for _ in range(count)]
+        elif tier == '17-clue':
+            puzzles = [shuffle(parse_puzzle(rng.choice(SEVENTEEN_SEEDS)), rng) for _ in range(count)]
+        elif tier == 'unsolvable':
+            puzzles = [_unsolvable(rng) for _ in range(count)]
+        elif tier == 'multi-solution':
+            puzzles = [_multi_solution(rng) for _ in range(count)]
+        elif tier in SIZE_TIERS:
+            puzzles = [_size_puzzle(*SIZE_TIERS[tier], rng) for _ in range(count)]
+        else:
+            raise ValueError(f'未知的档位: {tier}')
+        corpus[tier] = [format_puzzle(cells) for cells in puzzles]
+    return corpus
+
+
+def load_corpus(path):
+    """载入 generate_corpus 格式的 JSON 题库"""
+    with open(path, encoding='utf-8') as f:
+        corpus = json.load(f)
+    unknown = set(corpus) - set(TIERS)
+    if unknown:
+        raise ValueError(f'未知的档位: {", ".join(sorted(unknown))}')
+    return corpus
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def _grids(puzzles):
+    """题目字符串列表 -> (题目数, N²) 的 uint8 数组；标准数独走 parse_lines 的快速路径"""
+    if isinstance(puzzles, np.ndarray):
+        return puzzles
+    if all(len(p) == 81 for p in puzzles):
+        return parse_lines(puzzles)
+    return np.array([np.frombuffer(parse_puzzle(p), dtype=np.uint8) for p in puzzles])
+
+
+def _check(grid, solution):
+    """解必须保留所有已给数字，且每行/列/宫都是 1..N；grid 和 solution 都是长度 N² 的 uint8 数组"""
+    given = grid != 0
+    if (grid[given] != solution[given]).any():
+        return False
+    if len(grid) == 81:
+        units, digits = UNIT_CELLS, DIGITS
+    else:
+        g = geometry_for_cells(len(grid))
+        units, digits = np.array(g.units, dtype=np.intp), np.arange(1, g.n + 1, dtype=np.uint8)
+    return bool((np.sort(solution[units], axis=1) == digits).all())
+
+
+_parallel_solver = None
+
+
+def _solver(backend):
+    global _parallel_solver
+    if backend != 'parallel':
+        return get_solver(backend)
+    if _parallel_solver is None:
+        workers = os.cpu_count() or 1
+        _parallel_solver = ParallelSolver(ProcessPoolExecutor(max_workers=workers), workers)
+    return _parallel_solver
+
+
+def _run_solver(backend, grids, time_limit):
+    """逐题求解 (题目数, N²) 的题目数组，返回 (各题耗时（秒）, 解出/无解/超时/错误的计数)"""
+    solve_cells = _solver(backend).solve_cells
+    latencies = []
+    counts = {'solved': 0, 'no_solution': 0, 'timeout': 0, 'wrong': 0}
+    for grid in grids:
+        cells = grid.tobytes()
+        start = time.perf_counter()
+        try:
+            solution = solve_cells(cells, time_limit=time_limit)
+        except SolveTimeout:
+            counts['timeout'] += 1
+            latencies.append(time.perf_counter() - start)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if solution is None:
+            counts['no_solution'] += 1
+        elif _check(grid, np.frombuffer(solution, dtype=np.uint8)):
+            counts['solved'] += 1
+        else:
+            counts['wrong'] += 1
+    return latencies, counts
+
+
+def _run_numpy(grids, time_limit):
+    start = time.perf_counter()
+    solutions, solved = solve_batch(grids.reshape(-1, 9, 9), time_limit=time_limit)
+    elapsed = time.perf_counter() - start
+    counts = {'solved': 0, 'no_solution': 0, 'timeout': 0, 'wrong': 0}
+    for grid, solution, ok in zip(grids, solutions.reshape(-1, 81), solved):
+        if not ok:
+            counts['no_solution'] += 1
+        elif _check(grid, solution):
+            counts['solved'] += 1
+        else:
+            counts['wrong'] += 1
+    return elapsed, counts
+
+
+class FileTier:
+    """二进制题库中的一档（最多 limit 题），运行时按块解包，不把整个题库展开到内存中"""
+
+    def __init__(self, puzzle_file, limit=None):
+        self.file = puzzle_file
+        self.count = len(puzzle_file) if limit is None else min(limit, len(puzzle_file))
+
+    def __len__(self):
+        return self.count
+
+    def chunks(self, chunk_size=FILE_CHUNK_SIZE):
+        for start in range(0, self.count, chunk_size):
+            yield self.file.grids(start, min(start + chunk_size, self.count)).reshape(-1, 81)
+
+
+def _chunks(puzzles):
+    """按块产出 (题目数, N²) 的题目数组：二进制题库逐块解包，题目字符串列表一次转换"""
+    if isinstance(puzzles, FileTier):
+        return puzzles.chunks()
+    return [_grids(puzzles)]
+
+
+def _run_chunks(backend, puzzles, time_limit):
+    """逐块运行一个后端，返回 (总耗时（秒）, 各题耗时（numpy 后端为 None）, 计数)"""
+    elapsed = 0.0
+    latencies = None if backend == 'numpy' else []
+    counts = {'solved': 0, 'no_solution': 0, 'timeout': 0, 'wrong': 0}
+    for grids in _chunks(puzzles):
+        if backend == 'numpy':
+            chunk_elapsed, chunk_counts = _run_numpy(grids, time_limit)
+        else:
+            chunk_latencies, chunk_counts = _run_solver(backend, grids, time_limit)
+            chunk_elapsed = sum(chunk_latencies)
+            latencies.extend(chunk_latencies)
+        elapsed += chunk_elapsed
+        for key, value in chunk_counts.items():
+            counts[key] += value
+    return elapsed, latencies, counts
+
+
+def run_case(backend, tier, puzzles, time_limit=None, memory=True):
+    """
+    对一个后端和一个档位运行基准测试，返回结果字典。
+    puzzles 为题目字符串的列表、(N, 81) 的 uint8 数组，或二进制题库的 FileTier
+    """
+    result = {'backend': backend, 'tier': tier, 'count': len(puzzles)}
+    # 预热：触发延迟导入并让解释器的缓存就绪，不计入结果
+    for grids in _chunks(puzzles):
+        if backend == 'numpy':
+            _run_numpy(grids[:1], time_limit)
+        else:
+            _run_solver(backend, grids[:1], time_limit)
+        break
+
+    elapsed, latencies, counts = _run_chunks(backend, puzzles, time_limit)
+    if latencies is None:
+        result.update(p50_ms=None, p99_ms=None)
+    else:
+        latencies.sort()
+        result.update(p50_ms=round(_percentile(latencies, 0.5) * 1000, 3) if latencies else None,
+                      p99_ms=round(_percentile(latencies, 0.99) * 1000, 3) if latencies else None)
+    result.update(counts)
+    result['total_s'] = round(elapsed, 6)
+    result['puzzles_per_sec'] = round(len(puzzles) / elapsed, 3) if elapsed else None
+
+    # tracemalloc 会显著拖慢 Python 代码，因此内存单独再跑一遍，不影响计时
+    if memory:
+        tracemalloc.start()
+        try:
+            _run_chunks(backend, puzzles, time_limit)
+            result['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(corpus, backends=BACKENDS, time_limit=None, memory=True):
+    results = []
+    for tier, puzzles in corpus.items():
+        for backend in backends:
+            if backend == 'numpy' and tier in SIZE_TIERS:
+                continue
+            result = run_case(backend, tier, puzzles, time_limit, memory)
+            results.append(result)
+            print(_format_row(result), flush=True)
+    return results
+
+
+def _format_row(result):
+    def fmt(value, width, precision):
+        return f'{"-":>{width}}' if value is None else f'{value:>{width}.{precision}f}'
+
+    return (f"{result['tier']:<15} {result['backend']:<13} {result['count']:>6} "
+            f"{fmt(result['puzzles_per_sec'], 10, 1)} {fmt(result['p50_ms'], 9, 3)} "
+            f"{fmt(result['p99_ms'], 9, 3)} {fmt(result.get('peak_kb'), 9, 1)} "
+            f"{result['solved']:>6} {result['no_solution']:>6} {result['timeout']:>7} {result['wrong']:>5}")
+
+
+def compare(results, baseline, threshold=0.10):
+    """
+    与上一次的结果比较吞吐量，返回退化项列表 [(档位, 后端, 旧吞吐量, 新吞吐量), ...]。
+    吞吐量下降超过 threshold（比例）视为退化
+    """
+    previous = {(r['tier'], r['backend']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['tier'], result['backend']))
+        if not old or not old.get('puzzles_per_sec') or not result.get('puzzles_per_sec'):
+            continue
+        ratio = result['puzzles_per_sec'] / old['puzzles_per_sec']
+        marker = '退化' if ratio < 1 - threshold else ''
+        print(f"{result['tier']:<15} {result['backend']:<13} {old['puzzles_per_sec']:>10.1f} "
+              f"-> {result['puzzles_per_sec']:>10.1f}  x{ratio:.2f} {marker}")
+        if marker:
+            regressions.append((result['tier'], result['backend'], old['puzzles_per_sec'],
+                                result['puzzles_per_sec']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='数独求解器基准测试')
+    parser.add_argument('--count', type=int, default=50, help='生成题库时每档的题目数（默认50）')
+    parser.add_argument('--seed', type=int, default=0, help='生成题库的随机种子')
+    parser.add_argument('--tiers', nargs='+', choices=TIERS, default=list(TIERS), help='要运行的档位')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS + EXTRA_BACKENDS, default=list(BACKENDS),
+                        help='要运行的后端（parallel 需要显式指定）')
+    parser.add_argument('--corpus', help='从 JSON 文件载入题库，而不是生成')
+    parser.add_argument('--puzzle-file', nargs='+', default=[],
+                        help='二进制题库文件（puzzle_format），每个文件作为一档，以文件名命名')
+    parser.add_argument('--limit', type=int, default=None, help='每个二进制题库最多使用的题目数')
+    parser.add_argument('--save-corpus', help='把使用的题库保存为 JSON 文件')
+    parser.add_argument('--time-limit', type=float, default=10, help='单题时间上限（秒），0 表示不限制')
+    parser.add_argument('--no-memory', action='store_true', help='跳过峰值内存测量')
+    parser.add_argument('--output', help='把结果写入 JSON 文件')
+    parser.add_argument('--compare', help='与之前的 JSON 结果比较吞吐量')
+    parser.add_argument('--threshold', type=float, default=0.10, help='视为退化的吞吐量下降比例（默认0.10）')
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        corpus = {tier: puzzles for tier, puzzles in load_corpus(args.corpus).items() if tier in args.tiers}
+    elif args.puzzle_file:
+        corpus = {}
+    else:
+        start = time.perf_counter()
+        corpus = generate_corpus(args.count, args.seed, args.tiers)
+        print(f'生成题库用时 {time.perf_counter() - start:.1f} s', file=sys.stderr)
+    if args.save_corpus:
+        with open(args.save_corpus, 'w', encoding='utf-8') as f:
+            json.dump(corpus, f, indent=1)
+    # 二进制题库运行时按块从 memmap 解包，不经过字符串和列表，内存占用与题库大小无关
+    for path in args.puzzle_file:
+        tier = os.path.splitext(os.path.basename(path))[0]
+        corpus[tier] = FileTier(open_puzzle_file(path), args.limit)
+
+    print(f"{'tier':<15} {'backend':<13} {'count':>6} {'puzzles/s':>10} {'p50_ms':>9} {'p99_ms':>9} "
+          f"{'peak_kb':>9} {'solved':>6} {'none':>6} {'timeout':>7} {'wrong':>5}")
+    results = run_benchmarks(corpus, args.backends, args.time_limit or None, not args.no_memory)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': None if args.corpus else args.seed,
+        'corpus': args.corpus,
+        'puzzle_files': args.puzzle_file,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if any(r['wrong'] for r in results):
+        print('存在错误的解', file=sys.stderr)
+        status = 1
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.threshold):
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+大文件批量求解命令行工具
+
+输入文件每行一个 81 字符的题目（'.' 或 '0' 表示空格），空行会被跳过。
+输入以内存映射方式按块读取，每块交给进程池求解，结果按输入顺序写出，
+内存占用只与块大小和同时在途的块数有关，与文件大小无关。
+
+输出与输入格式相同，每个题目一行：解出时是 81 位数字的解；
+无解、超时或格式错误的题目输出 81 个 '.'，数量在结束时汇总。
+
+每写完一块就更新检查点文件（<输出文件>.progress），中断后加 --resume 重新运行即可从检查点继续。
+
+用法::
+
+    python bulk_solve.py puzzles.txt solutions.txt --workers 8
+    python bulk_solve.py puzzles.txt solutions.txt --resume
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from puzzle_format import _DECODE, _ENCODE
+from sudoku_solver import SOLVER_NAMES, SolveTimeout, budget_from_env, get_solver
+
+LINE_LENGTH = 81
+# 求解失败的题目在输出中对应的行
+FAILED_LINE = b'.' * LINE_LENGTH + b'\n'
+
+
+def solve_lines(lines, solver_name='backtracking', time_limit=None, max_nodes=None):
+    """
+    求解一块题目行（bytes 列表），返回 (输出字节, 各状态计数)。
+    题目直接以扁平字节传给 solve_cells，不构建嵌套列表
+    """
+    solve_cells = get_solver(solver_name).solve_cells
+    out = []
+    counts = {'solved': 0, 'no_solution': 0, 'timeout': 0, 'invalid': 0}
+    for line in lines:
+        cells = line.translate(_DECODE)
+        if len(cells) != LINE_LENGTH or max(cells) > 9:
+            counts['invalid'] += 1
+            out.append(FAILED_LINE)
+            continue
+        try:
+            solution = solve_cells(cells, time_limit=time_limit, max_nodes=max_nodes)
+        except SolveTimeout:
+            counts['timeout'] += 1
+            out.append(FAILED_LINE)
+            continue
+        if solution is None:
+            counts['no_solution'] += 1
+            out.append(FAILED_LINE)
+        else:
+            counts['solved'] += 1
+            out.append(solution.translate(_ENCODE) + b'\n')
+    return b''.join(out), counts
+
+
+def iter_chunks(data, offset, chunk_size):
+    """
+    从 offset 开始按块读取题目行，产出 (块结束处的偏移, 题目行列表)。
+    data 可以是 mmap，也可以是普通的字节串
+    """
+    size = len(data)
+    while offset < size:
+        lines = []
+        while offset < size and len(lines) < chunk_size:
+            end = data.find(b'\n', offset)
+            if end < 0:
+                end = size
+            line = data[offset:end].strip()
+            offset = end + 1
+            if line:
+                lines.append(line)
+        if lines:
+            yield min(offset, size), lines
+
+
+class Checkpoint:
+    """检查点：已处理到的输入偏移、输出字节数和累计计数，写入时先写临时文件再替换"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress:
+    """在标准错误上输出进度和吞吐量，最多每 interval 秒刷新一次"""
+
+    def __init__(self, total_bytes, done=0, interval=1.0):
+        self.total_bytes = total_bytes
+        self.started = time.perf_counter()
+        self.start_done = done
+        self.interval = interval
+        self._last = 0.0
+
+    def update(self, done, offset, force=False):
+        now = time.perf_counter()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = now - self.started
+        rate = (done - self.start_done) / elapsed if elapsed else 0.0
+        percent = offset * 100 / self.total_bytes if self.total_bytes else 100.0
+        print(f'\r已处理 {done} 题（{percent:.1f}%），{rate:.0f} 题/秒', end='', file=sys.stderr, flush=True)
+
+
+def bulk_solve(input_path, output_path, solver_name='backtracking', workers=None, chunk_size=1000,
+               time_limit=None, max_nodes=None, resume=False, progress=True):
+    """
+    求解 input_path 中的全部题目，把解按行写入 output_path，返回累计的状态计数。
+    resume 为 True 且存在检查点时，从上次中断处继续
+    """
+    checkpoint = Checkpoint(output_path + '.progress')
+    state = checkpoint.load() if resume else None
+    if state is None:
+        state = {'input_offset': 0, 'output_bytes': 0, 'puzzles': 0,
+                 'counts': {'solved': 0, 'no_solution': 0, 'timeout': 0, 'invalid': 0}}
+        mode = 'wb'
+    else:
+        mode = 'r+b'
+
+    workers = workers or os.cpu_count() or 1
+    # 同时在途的块数，限制内存占用
+    window = workers * 2
+
+    with open(input_path, 'rb') as f_in, open(output_path, mode) as f_out:
+        size = os.fstat(f_in.fileno()).st_size
+        # 空文件不能做内存映射
+        data = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        # 丢弃检查点之后写出的不完整输出
+        f_out.truncate(state['output_bytes'])
+        f_out.seek(state['output_bytes'])
+        reporter = Progress(size, state['puzzles']) if progress else None
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending = deque()
+        try:
+            for offset, lines in iter_chunks(data, state['input_offset'], chunk_size):
+                pending.append((offset, executor.submit(solve_lines, lines, solver_name, time_limit, max_nodes)))
+                while len(pending) >= window:
+                    _write_chunk(pending.popleft(), f_out, state, checkpoint, reporter)
+            while pending:
+                _write_chunk(pending.popleft(), f_out, state, checkpoint, reporter)
+        finally:
+            # 中断时不等待在途的块，它们会在继续运行时重新求解
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            if reporter is not None:
+                reporter.update(state['puzzles'], state['input_offset'], force=True)
+                print(file=sys.stderr)
+            if size:
+                data.close()
+    checkpoint.remove()
+    return state['counts']
+
+
+def _write_chunk(item, f_out, state, checkpoint, reporter):
+    offset, future = item
+    output, counts = future.result()
+    f_out.write(output)
+    f_out.flush()
+    os.fsync(f_out.fileno())
+    state['input_offset'] = offset
+    state['output_bytes'] += len(output)
+    state['puzzles'] += sum(counts.values())
+    for status, count in counts.items():
+        state['counts'][status] += count
+    checkpoint.save(state)
+    if reporter is not None:
+        reporter.update(state['puzzles'], offset)
+
+
+def main(argv=None):
+    budget = budget_from_env()
+    parser = argparse.ArgumentParser(description='批量求解 81 字符每行的题目文件')
+    parser.add_argument('input', help='输入文件')
+    parser.add_argument('output', help='输出文件')
+    parser.add_argument('--solver', choices=SOLVER_NAMES, default='backtracking', help='求解后端')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认为CPU核数）')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='每块的题目数（默认1000）')
+    parser.add_argument('--time-limit', type=float, default=budget['time_limit'] or 0,
+                        help='单题时间上限（秒），0 表示不限制，默认读取 SOLVE_TIME_LIMIT')
+    parser.add_argument('--max-nodes', type=int, default=budget['max_nodes'] or 0,
+                        help='单题节点上限，0 表示不限制，默认读取 SOLVE_MAX_NODES')
+    parser.add_argument('--resume', action='store_true', help='从上次中断处继续')
+    parser.add_argument('--quiet', action='store_true', help='不输出进度')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        counts = bulk_solve(args.input, args.output, args.solver, args.workers, args.chunk_size,
+                            args.time_limit or None, args.max_nodes or None, args.resume, not args.quiet)
+    except KeyboardInterrupt:
+        print('已中断，使用 --resume 可以从检查点继续', file=sys.stderr)
+        return 130
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f'完成：共 {total} 题，解出 {counts["solved"]}，无解 {counts["no_solution"]}，'
+          f'超时 {counts["timeout"]}，格式错误 {counts["invalid"]}，用时 {elapsed:.1f} s',
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Dancing Links（Knuth 算法X）精确覆盖求解器
+
+N×N 数独被表示为 N³ 行（格子 × 数字）× 4N² 列（格子、行-数字、列-数字、宫-数字四类约束）的
+精确覆盖问题，标准 9x9 为 729 行 × 324 列。链表节点用并行的整数列表存储，
+每种尺寸的矩阵模板在第一次用到时构建一次，每次求解只复制其中会被修改的几个列表。
+"""
+import time
+
+from sudoku_solver import STANDARD, SearchBudget, SolveTimeout, board_to_cells, cells_to_board, geometry_for_cells
+
+N_COLUMNS = 324
+
+
+def _row_columns(cell, digit, geometry=STANDARD):
+    """(格子, 数字) 对应的四个约束列编号（从1开始，0号节点为根）"""
+    n, size = geometry.n, geometry.size
+    d = digit - 1
+    return (1 + cell,
+            1 + size + geometry.row_of[cell] * n + d,
+            1 + 2 * size + geometry.col_of[cell] * n + d,
+            1 + 3 * size + geometry.box_of[cell] * n + d)
+
+
+class _Template:
+    """某一尺寸的 DLX 矩阵模板"""
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        n_columns = 4 * geometry.size
+        L = [n_columns] + list(range(n_columns))
+        R = list(range(1, n_columns + 1)) + [0]
+        U = list(range(n_columns + 1))
+        D = list(range(n_columns + 1))
+        C = list(range(n_columns + 1))
+        S = [0] * (n_columns + 1)
+        ROW = [-1] * (n_columns + 1)
+
+        for row_id in range(geometry.size * geometry.n):
+            cell, d = divmod(row_id, geometry.n)
+            first = len(L)
+            for col in _row_columns(cell, d + 1, geometry):
+                node = len(L)
+                C.append(col)
+                ROW.append(row_id)
+                U.append(U[col])
+                D.append(col)
+                D[U[col]] = node
+                U[col] = node
+                S[col] += 1
+                if node == first:
+                    L.append(node)
+                    R.append(node)
+                else:
+                    L.append(L[first])
+                    R.append(first)
+                    R[L[first]] = node
+                    L[first] = node
+        self.L, self.R, self.U, self.D, self.C, self.S, self.ROW = L, R, U, D, C, S, ROW
+
+
+_templates = {}
+
+
+def _template(geometry):
+    template = _templates.get(geometry.box)
+    if template is None:
+        template = _templates[geometry.box] = _Template(geometry)
+    return template
+
+
+_template(STANDARD)
+
+
+class _DancingLinks:
+    """一次求解使用的 DLX 矩阵副本"""
+
+    def __init__(self, budget=None, template=None):
+        template = template or _template(STANDARD)
+        self.budget = budget or SearchBudget()
+        self.geometry = template.geometry
+        self.L = template.L[:]
+        self.R = template.R[:]
+        self.U = template.U[:]
+        self.D = template.D[:]
+        self.S = template.S[:]
+        # 列号和行号只读，不需要复制
+        self.C = template.C
+        self.ROW = template.ROW
+        self.solution = []
+
+    def cover(self, c):
+        L, R, U, D, S, C = self.L, self.R, self.U, self.D, self.S, self.C
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, S, C = self.L, self.R, self.U, self.D, self.S, self.C
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def select_givens(self, cells):
+        """把扁平盘面中已给的数字对应的行直接选入解，已给数字冲突时返回 False"""
+        g = self.geometry
+        covered = set()
+        for cell in range(g.size):
+            value = cells[cell]
+            if value == 0:
+                continue
+            if not 1 <= value <= g.n:
+                raise ValueError(f'无效的数字: {value}')
+            columns = _row_columns(cell, value, g)
+            if covered.intersection(columns):
+                return False
+            covered.update(columns)
+            for col in columns:
+                self.cover(col)
+            self.solution.append(cell * g.n + value - 1)
+        return True
+
+    def search(self):
+        """逐个产生精确覆盖解（行编号列表）"""
+        self.budget.tick()
+        R, D, S, C, ROW = self.R, self.D, self.S, self.C, self.ROW
+        if R[0] == 0:
+            yield list(self.solution)
+            return
+
+        # 选择剩余节点最少的列
+        c = R[0]
+        best = c
+        while c != 0:
+            if S[c] < S[best]:
+                best = c
+                if S[c] <= 1:
+                    break
+            c = R[c]
+        if S[best] == 0:
+            return
+
+        self.cover(best)
+        r = D[best]
+        while r != best:
+            self.solution.append(ROW[r])
+            j = R[r]
+            while j != r:
+                self.cover(C[j])
+                j = R[j]
+            yield from self.search()
+            j = self.L[r]
+            while j != r:
+                self.uncover(C[j])
+                j = self.L[j]
+            self.solution.pop()
+            r = D[r]
+        self.uncover(best)
+
+
+def _solutions(cells, time_limit=None, max_nodes=None, stats=None):
+    dlx = _DancingLinks(SearchBudget(time_limit, max_nodes), _template(geometry_for_cells(len(cells))))
+    if not dlx.select_givens(cells):
+        return iter(())
+    if stats is None:
+        return dlx.search()
+    return _timed(dlx, stats)
+
+
+def _timed(dlx, stats):
+    """
+    记录 DLX 搜索的节点数和耗时。
+    DLX 没有单独的传播阶段，回溯、深度等计数只由位掩码引擎收集
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield from dlx.search()
+    finally:
+        stats.nodes += dlx.budget.nodes
+        stats.wall_time += time.perf_counter() - wall
+        stats.cpu_time += time.process_time() - cpu
+
+
+def _rows_to_cells(rows, size):
+    """精确覆盖解（行编号列表）-> 扁平盘面 bytes"""
+    n = geometry_for_cells(size).n
+    solution = bytearray(size)
+    for row_id in rows:
+        cell, d = divmod(row_id, n)
+        solution[cell] = d + 1
+    return bytes(solution)
+
+
+class DLXSolver:
+    @staticmethod
+    def solve_cells(cells, time_limit=None, max_nodes=None, stats=None):
+        """
+        在 N² 字节的扁平盘面上求解（标准数独为 81 字节），返回解（bytes），无解时返回 None。
+        time_limit（秒）/max_nodes 为搜索预算，超出时抛出 SolveTimeout；
+        stats 为 SolveStats 实例时记录节点数和耗时
+        """
+        solutions = _solutions(cells, time_limit, max_nodes, stats)
+        for rows in solutions:
+            solutions.close()
+            return _rows_to_cells(rows, len(cells))
+        return None
+
+    @staticmethod
+    def solve(board, time_limit=None, max_nodes=None, stats=None):
+        """求解 N×N 题目，返回新的解（N×N 列表），无解时返回 None；board 不会被修改"""
+        solution = DLXSolver.solve_cells(board_to_cells(board), time_limit, max_nodes, stats)
+        return None if solution is None else cells_to_board(solution)
+
+    @staticmethod
+    def solve_sudoku(board, time_limit=None, max_nodes=None, stats=None):
+        """
+        求解数独，成功时原地填充 board 并返回 True，无解时 board 保持不变。
+        time_limit（秒）/max_nodes 为搜索预算，超出时抛出 SolveTimeout
+        """
+        solution = DLXSolver.solve_cells(board_to_cells(board), time_limit, max_nodes, stats)
+        if solution is None:
+            return False
+        n = len(board)
+        for r in range(n):
+            board[r][:] = solution[r * n:r * n + n]
+        return True
+
+    @staticmethod
+    def count_solutions_cells(cells, limit=2, time_limit=None, max_nodes=None, stats=None):
+        """
+        统计扁平盘面的解的个数，找到 limit 个解后立即停止，返回 (解的个数, 第一个解（bytes）或 None)。
+        超出预算时抛出 SolveTimeout，其 solution 为超时前已经找到的第一个解
+        """
+        count, first = 0, None
+        solutions = _solutions(cells, time_limit, max_nodes, stats)
+        try:
+            for rows in solutions:
+                if first is None:
+                    first = _rows_to_cells(rows, len(cells))
+                count += 1
+                if count >= limit:
+                    solutions.close()
+                    break
+        except SolveTimeout as e:
+            e.solution = first
+            raise
+        return count, first
+
+    @staticmethod
+    def count_solutions(board, limit=2, time_limit=None, max_nodes=None, stats=None):
+        """统计解的个数，找到 limit 个解后立即停止；board 不会被修改"""
+        return DLXSolver.count_solutions_cells(board_to_cells(board), limit, time_limit, max_nodes, stats)[0]
@@ -0,0 +1,235 @@
+"""
+Prometheus 文本格式的运行指标
+
+不依赖 prometheus_client。计数器和直方图在热路径上只做一次 deque.append
+（在 CPython 中是原子操作），不加锁；事件在抓取 /metrics 时、或积压过多时由
+拿到折叠锁的线程（非阻塞地尝试获取）合并进累计值，因此抓取永远不会阻塞请求处理。
+
+指标都是进程内的：ASGI 入口的工作进程把求解耗时和缓存统计随结果一起返回，
+由主进程汇总后再记录到这里。
+"""
+import threading
+from bisect import bisect_left
+from collections import deque
+
+# 积压的事件超过该数量时，由记录事件的线程顺便合并（拿不到锁就跳过）
+_FOLD_THRESHOLD = 4096
+
+# 请求/求解耗时的直方图分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def pool_queue_depth(executor):
+    """
+    进程池中已提交但尚未完成的任务数（排队中 + 执行中）。
+    ProcessPoolExecutor 没有公开这个数字，这里只读它内部的任务表，不加锁也不影响提交
+    """
+    if executor is None:
+        return 0
+    return len(getattr(executor, '_pending_work_items', ()))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._registry = registry
+        self._events = deque()
+
+    def _record(self, event):
+        self._events.append(event)
+        if len(self._events) > _FOLD_THRESHOLD and self._registry.fold_lock.acquire(blocking=False):
+            try:
+                self.fold()
+            finally:
+                self._registry.fold_lock.release()
+
+    def fold(self):
+        """把积压的事件合并进累计值，只在持有 registry.fold_lock 时调用"""
+        events = self._events
+        for _ in range(len(events)):
+            self._apply(events.popleft())
+
+    def _check_labels(self, values):
+        if len(values) != len(self.labels):
+            raise ValueError(f'{self.name} 需要标签 {self.labels}')
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, registry, name, help_text, labels=()):
+        super().__init__(registry, name, help_text, labels)
+        self._totals = {}
+
+    def inc(self, *label_values, amount=1):
+        self._check_labels(label_values)
+        self._record((label_values, amount))
+
+    def _apply(self, event):
+        key, amount = event
+        self._totals[key] = self._totals.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self._totals.items()):
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签：[各分桶计数（最后一个为 +Inf）, 总和, 次数]
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        self._check_labels(label_values)
+        self._record((label_values, value))
+
+    def _apply(self, event):
+        key, value = event
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _format_value(bound)
+                yield self.name + '_bucket', _format_labels(self.labels, key, [('le', le)]), cumulative
+            yield self.name + '_sum', _format_labels(self.labels, key), total
+            yield self.name + '_count', _format_labels(self.labels, key), count
+
+
+class Callback(_Metric):
+    """抓取时调用 func 取值的指标；func 返回数值，或 {标签值元组: 数值} 的字典"""
+
+    def __init__(self, registry, name, help_text, func, kind='gauge', labels=()):
+        super().__init__(registry, name, help_text, labels)
+        self.kind = kind
+        self.func = func
+
+    def fold(self):
+        pass
+
+    def samples(self):
+        value = self.func()
+        if isinstance(value, dict):
+            for key, v in sorted(value.items()):
+                yield self.name, _format_labels(self.labels, key), v
+        elif value is not None:
+            yield self.name, '', value
+
+
+class Registry:
+    def __init__(self):
+        self.fold_lock = threading.Lock()
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(self, name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self, name, help_text, labels, buckets))
+
+    def callback(self, name, help_text, func, kind='gauge', labels=()):
+        return self._add(Callback(self, name, help_text, func, kind, labels))
+
+    def render(self):
+        """生成 Prometheus 文本格式"""
+        lines = []
+        with self.fold_lock:
+            for metric in self._metrics:
+                metric.fold()
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                for name, labels, value in metric.samples():
+                    lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class ServiceMetrics:
+    """
+    各服务入口共用的指标：请求数（按接口和结果）、请求耗时、求解耗时、批量题目结果、
+    图像识别各阶段耗时，以及可选的解缓存统计（cache_stats 为返回 SolutionCache.stats() 格式的函数）
+    """
+
+    def __init__(self, cache_stats=None):
+        self.registry = Registry()
+        self.requests = self.registry.counter(
+            'sudoku_requests_total', 'Requests by endpoint and result status', ('endpoint', 'status'))
+        self.request_seconds = self.registry.histogram(
+            'sudoku_request_duration_seconds', 'Request handling time in seconds', ('endpoint',))
+        self.solve_seconds = self.registry.histogram(
+            'sudoku_solve_duration_seconds', 'Solve time including cache lookup in seconds', ('solver',))
+        self.batch_puzzles = self.registry.counter(
+            'sudoku_batch_puzzles_total', 'Puzzles solved through /solve/batch by status', ('status',))
+        self.image_stage_seconds = self.registry.histogram(
+            'sudoku_image_stage_seconds', 'Image pipeline stage time in seconds', ('stage',))
+        if cache_stats is not None:
+            self.registry.callback('sudoku_cache_hits_total', 'Solution cache hits',
+                                   lambda: cache_stats()['hits'], kind='counter')
+            self.registry.callback('sudoku_cache_misses_total', 'Solution cache misses',
+                                   lambda: cache_stats()['misses'], kind='counter')
+            self.registry.callback('sudoku_cache_entries', 'Solution cache entries held in memory',
+                                   lambda: cache_stats()['size'])
+            self.registry.callback('sudoku_cache_hit_ratio', 'Solution cache hit ratio',
+                                   lambda: cache_stats()['hit_ratio'])
+
+    def observe_request(self, endpoint, status, seconds):
+        self.requests.inc(endpoint, status)
+        self.request_seconds.observe(seconds, endpoint)
+
+    def observe_batch_result(self, result, solver_name):
+        """记录 /solve/batch 中单个题目的结果和求解耗时"""
+        self.batch_puzzles.inc(result.get('status', 'error'))
+        if 'status' in result:
+            self.solve_seconds.observe(result['time_ms'] / 1000, solver_name)
+
+    def observe_timings(self, timings):
+        """记录图像识别流水线返回的各阶段耗时（毫秒）"""
+        for stage, ms in timings.items():
+            self.image_stage_seconds.observe(ms / 1000, stage)
+
+    def gauge(self, name, help_text, func):
+        return self.registry.callback(name, help_text, func)
+
+    def startup_report(self, report):
+        """把 StartupReport 的各阶段启动耗时暴露为 sudoku_startup_phase_seconds"""
+        return self.registry.callback('sudoku_startup_phase_seconds', 'Service startup time by phase in seconds',
+                                      report.phase_seconds, labels=('phase',))
+
+    def render(self):
+        return self.registry.render()
@@ -1,5 +1,8 @@
 import streamlit as st
-import copy
+
+from puzzle_generator import DIFFICULTIES
+from puzzle_pool import get_pool
+from streamlit_grid import display_sudoku_grid, solve_puzzle
 
 # 设置页面配置
 st.set_page_config(
@@ -8,81 +11,6 @@ st.set_page_config(
     layout="centered"
 )
 
-# 数独求解器类
-class SudokuSolver:
-    @staticmethod
-    def is_valid(board, row, col, num):
-        """检查在给定位置放置数字是否有效"""
-        # 检查行
-        for i in range(9):
-            if board[row][i] == num:
-                return False
-        
-        # 检查列
-        for i in range(9):
-            if board[i][col] == num:
-                return False
-        
-        # 检查3x3子网格
-        start_row = row - row % 3
-        start_col = col - col % 3
-        for i in range(3):
-            for j in range(3):
-                if board[i + start_row][j + start_col] == num:
-                    return False
-        
-        return True
-
-    @staticmethod
-    def solve_sudoku(board):
-        """使用回溯算法解决数独"""
-        for i in range(9):
-            for j in range(9):
-                if board[i][j] == 0:
-                    for num in range(1, 10):
-                        if SudokuSolver.is_valid(board, i, j, num):
-                            board[i][j] = num
-                            if SudokuSolver.solve_sudoku(board):
-                                return True
-                            board[i][j] = 0
-                    return False
-        return True
-
-# 显示数独网格的函数
-def display_sudoku_grid(grid_data, title):
-    st.subheader(title)
-    
-    # 创建HTML表格来显示数独网格
-    table_html = "<table style='border-collapse: collapse; margin: 10px auto;'>"
-    
-    for i in range(9):
-        table_html += "<tr>"
-        for j in range(9):
-            # 添加边框样式
-            border_style = "border: 1px solid #999; width: 40px; height: 40px; text-align: center; vertical-align: middle;"
-            
-            # 添加粗边框分隔3x3宫格
-            if i % 3 == 0 and i != 0:
-                border_style += " border-top: 3px solid #000;"
-            if j % 3 == 0 and j != 0:
-                border_style += " border-left: 3px solid #000;"
-            if i == 8:
-                border_style += " border-bottom: 3px solid #000;"
-            if j == 8:
-                border_style += " border-right: 3px solid #000;"
-            
-            # 添加背景色
-            bg_color = ""
-            if grid_data[i][j] != 0:
-                bg_color = "background-color: #e0e0e0;"  # 原始数字背景色
-            
-            cell_value = grid_data[i][j] if grid_data[i][j] != 0 else ""
-            table_html += f"<td style='{border_style} {bg_color} font-weight: bold; font-size: 20px;'>{cell_value}</td>"
-        table_html += "</tr>"
-    
-    table_html += "</table>"
-    st.markdown(table_html, unsafe_allow_html=True)
-
 # 应用标题
 st.title("🔢 数独求解器")
 
@@ -91,7 +19,7 @@ st.markdown("""
 这是一个简单的数独求解器，可以直接输入数独题目并求解。
 """)
 
-# 创建示例数独
+# 题目池暂时为空时使用的示例数独
 sample_sudoku = [
     [5, 3, 0, 0, 7, 0, 0, 0, 0],
     [6, 0, 0, 1, 9, 5, 0, 0, 0],
@@ -104,6 +32,13 @@ sample_sudoku = [
     [0, 0, 0, 0, 8, 0, 0, 7, 9]
 ]
 
+# 从预生成的题目池中取示例题目（进程内共用，后台线程补充）
+puzzle_pool = get_pool()
+difficulty = st.selectbox("难度", DIFFICULTIES, index=1)
+if st.button("换一题") or 'sample' not in st.session_state:
+    st.session_state.sample = puzzle_pool.take_board(difficulty) or sample_sudoku
+sample_sudoku = st.session_state.sample
+
 # 显示示例数独
 st.subheader("示例数独")
 display_sudoku_grid(sample_sudoku, "示例题目")
@@ -111,22 +46,22 @@ display_sudoku_grid(sample_sudoku, "示例题目")
 # 求解示例数独
 if st.button("求解示例数独"):
     with st.spinner("正在求解数独..."):
-        # 创建要解决的数独副本
-        solved_sudoku = copy.deepcopy(sample_sudoku)
-        
-        # 解决数独
-        solver = SudokuSolver()
-        if solver.solve_sudoku(solved_sudoku):
+        # 解决数独（结果按题目缓存，重复求解同一题目不再计算）
+        result = solve_puzzle(sample_sudoku)
+        if result['status'] == 'solved':
             st.success("数独已成功求解！")
-            display_sudoku_grid(solved_sudoku, "求解结果")
-        else:
+            display_sudoku_grid(result['solution'], "求解结果")
+        elif result['status'] == 'no_solution':
             st.error("该数独无解")
+        else:
+            st.warning(f"求解超时：{result['message']}")
+        st.caption("求解统计：" + result['stats'])
 
 # 技术说明
 st.markdown("---")
 st.markdown("### 技术说明")
 st.markdown("""
-- 使用回溯算法求解数独
+- 使用位掩码约束传播 + 回溯算法求解数独
 - 使用Streamlit构建用户界面
 """)
 
@@ -0,0 +1,140 @@
+"""
+NumPy 向量化批量求解
+
+对形状为 (N, 9, 9) 的 uint8 题目数组，用 (N, 81) 的 uint16 位掩码数组保存候选数，
+整批同时做裸单/隐单传播。只有传播后仍未填满的题目才逐个交给 SudokuSolver 搜索，
+简单和中等难度的题目完全不会进入 Python 层面的递归。
+
+用法::
+
+    solutions, solved = solve_batch(puzzles)   # puzzles: (N, 9, 9) uint8
+    solve_file('puzzles.sdk', 'solved.sdk')     # 二进制题库，按块求解
+"""
+import numpy as np
+
+from puzzle_format import create_puzzle_file, open_puzzle_file, pack
+from sudoku_solver import UNITS, SolveTimeout, get_solver
+
+FULL_MASK = 0x1FF
+
+UNIT_CELLS = np.array(UNITS, dtype=np.intp)                      # (27, 9)
+CELL_UNITS = np.array([[i // 9, 9 + i % 9, 18 + (i // 27) * 3 + (i % 9) // 3]
+                       for i in range(81)], dtype=np.intp)       # (81, 3)
+
+POPCOUNT = np.array([bin(m).count('1') for m in range(FULL_MASK + 1)], dtype=np.uint8)
+# 只有一位为1的掩码对应的数字，其他为0
+SINGLE_DIGIT = np.zeros(FULL_MASK + 1, dtype=np.uint8)
+for _d in range(9):
+    SINGLE_DIGIT[1 << _d] = _d + 1
+DIGIT_BITS = (1 << np.arange(9)).astype(np.uint16)
+DIGIT_BIT_OF = np.concatenate([[0], DIGIT_BITS]).astype(np.uint16)  # 数字 -> 位，0 -> 0
+
+
+def compute_candidates(grid):
+    """
+    计算候选数位掩码。
+    返回 (cand, ok)：cand 为 (N, 81) uint16，已填格子为0；
+    ok 为 (N,) bool，已填数字有重复或空格没有候选数时为 False
+    """
+    bits = DIGIT_BIT_OF[grid]                                        # (N, 81)
+    unit_bits = bits[:, UNIT_CELLS]                                  # (N, 27, 9)
+    used = np.bitwise_or.reduce(unit_bits, axis=2)                   # (N, 27)
+    filled = np.count_nonzero(unit_bits, axis=2)
+    ok = (POPCOUNT[used] == filled).all(axis=1)
+
+    blocked = np.bitwise_or.reduce(used[:, CELL_UNITS], axis=2)      # (N, 81)
+    cand = (~blocked & FULL_MASK).astype(np.uint16)
+    empty = grid == 0
+    cand[~empty] = 0
+    ok &= ~(empty & (cand == 0)).any(axis=1)
+    return cand, ok
+
+
+def propagate(grid):
+    """
+    对整批题目原地做裸单和隐单传播，直到不再有变化。
+    grid 为 (N, 81) uint8，返回 (N,) bool，False 表示题目出现矛盾
+    """
+    ok = np.ones(len(grid), dtype=bool)
+    active = np.arange(len(grid))
+    while len(active):
+        sub = grid[active]
+        cand, sub_ok = compute_candidates(sub)
+        ok[active[~sub_ok]] = False
+
+        # 裸单
+        naked = SINGLE_DIGIT[cand]
+        changed = naked != 0
+        sub = np.where(changed, naked, sub)
+
+        # 隐单：某数字在单元内只出现在一个格子的候选中
+        unit_cand = cand[:, UNIT_CELLS]                              # (n, 27, 9)
+        once = np.zeros(unit_cand.shape[:2], dtype=np.uint16)
+        twice = np.zeros_like(once)
+        for k in range(9):
+            twice |= once & unit_cand[:, :, k]
+            once |= unit_cand[:, :, k]
+        singles = once & ~twice                                       # (n, 27)
+        hidden_bits = cand & np.bitwise_or.reduce(singles[:, CELL_UNITS], axis=2)
+        hidden = SINGLE_DIGIT[hidden_bits]
+        found = (hidden != 0) & ~changed
+        sub = np.where(found, hidden, sub)
+        changed |= found
+
+        grid[active] = sub
+        progressing = sub_ok & changed.any(axis=1)
+        active = active[progressing]
+    return ok
+
+
+def solve_batch(puzzles, solver_name='backtracking', time_limit=None, max_nodes=None):
+    """
+    批量求解 (N, 9, 9) 的题目数组。
+    返回 (solutions, solved)：solutions 为 (N, 9, 9) uint8，无解的题目对应全0；
+    solved 为 (N,) bool。time_limit/max_nodes 是单个题目搜索的预算，超出预算的题目视为未解出
+    """
+    puzzles = np.asarray(puzzles, dtype=np.uint8)
+    if puzzles.ndim != 3 or puzzles.shape[1:] != (9, 9):
+        raise ValueError(f'题目数组形状应为 (N, 9, 9)，实际为 {puzzles.shape}')
+    if (puzzles > 9).any():
+        raise ValueError('题目中存在大于9的数字')
+
+    grid = puzzles.reshape(len(puzzles), 81).copy()
+    ok = propagate(grid)
+
+    # 传播产生的完整盘面还需要确认没有冲突
+    _, valid = compute_candidates(grid)
+    ok &= valid
+    complete = ok & (grid != 0).all(axis=1)
+
+    solver = get_solver(solver_name)
+    for n in np.nonzero(ok & ~complete)[0]:
+        try:
+            solution = solver.solve_cells(grid[n].tobytes(), time_limit=time_limit, max_nodes=max_nodes)
+        except SolveTimeout:
+            continue
+        if solution is not None:
+            grid[n] = np.frombuffer(solution, dtype=np.uint8)
+            complete[n] = True
+
+    grid[~complete] = 0
+    return grid.reshape(len(puzzles), 9, 9), complete
+
+
+def solve_file(input_path, output_path, solver_name='backtracking', time_limit=None, max_nodes=None,
+               chunk_size=65536):
+    """
+    按块求解二进制题库 input_path，写出带解列的 output_path（未解出的题目解为全0）。
+    两个文件都通过 memmap 访问，内存占用只与 chunk_size 有关。返回解出的题目数
+    """
+    src = open_puzzle_file(input_path)
+    dst = create_puzzle_file(output_path, len(src), with_solutions=True)
+    total = 0
+    for start, grids in src.iter_chunks(chunk_size):
+        end = start + len(grids)
+        solutions, solved = solve_batch(grids, solver_name, time_limit, max_nodes)
+        dst.puzzles[start:end] = src.puzzles[start:end]
+        dst.solutions[start:end] = pack(solutions)
+        total += int(solved.sum())
+    dst.flush()
+    return total
@@ -0,0 +1,161 @@
+"""
+并行推测搜索：把一道难题的搜索树拆成子树，在进程池的多个核上同时搜索
+
+绝大多数题目几百个节点就能解出，拆分只会增加进程间通信的开销，因此先在当前进程中搜索
+local_nodes 个节点；搜不完时，把搜索树中还没搜索的部分（中断时所在的节点，以及各层分支点
+剩余的选项，见 _BitmaskSearch.frontier）作为子树提交给进程池。每个子树同样只搜索 quantum 个节点，
+搜不完就把自己剩下的部分再拆成子树交回来排队：大的子树会被不断拆开分给空闲的进程（相当于工作窃取），
+不会出现一个进程守着一棵巨大的子树、其他进程空闲的情况。
+
+第一个找到解的子树胜出，排队中的子树立即取消，正在运行的子树最多再搜索 quantum 个节点就会结束，
+其结果直接丢弃。子树互不相交，合起来正好是整棵搜索树，因此唯一解的题目结果与顺序搜索完全相同，
+多解的题目可能返回另一个解。count_solutions 把各子树找到的解数相加，达到 limit 时同样立即停止。
+"""
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from sudoku_solver import (SearchBudget, SolveTimeout, _BitmaskSearch, board_to_cells, cells_to_board,
+                           geometry_for_cells)
+
+# 每个子树任务最多搜索的节点数（9x9 约 20~40 毫秒），也决定了取消后正在运行的子树多久能结束
+QUANTUM = 2000
+# 提交到进程池之前，在当前进程中先搜索的节点数
+LOCAL_NODES = 2000
+
+
+def search_subtree(cells, limit, quantum, time_limit=None):
+    """
+    搜索一个子树，最多访问 quantum 个节点（进程池中执行的任务，拆分前的本地搜索也用它）。
+    返回 (找到的解数, 第一个解或 None, 没搜完时剩余的子树列表或 None, 访问的节点数, 是否超出时间预算)
+    """
+    engine = _BitmaskSearch(SearchBudget(time_limit, quantum), geometry_for_cells(len(cells)))
+    if not engine.load(cells):
+        return 0, None, None, 0, False
+    try:
+        found = engine.run(limit)
+    except SolveTimeout:
+        nodes = engine.budget.nodes
+        if nodes <= quantum:
+            # 节点配额还没用完，是时间预算先用完了
+            return engine.found, engine.solution, None, nodes, True
+        return engine.found, engine.solution, engine.frontier(), nodes, False
+    return found, engine.solution, None, engine.budget.nodes, False
+
+
+class _Search:
+    """一次并行搜索的汇总状态：已找到的解、访问的节点数和等待搜索的子树"""
+
+    def __init__(self, limit, time_limit, max_nodes):
+        self.limit = limit
+        self.max_nodes = max_nodes
+        self.started = time.perf_counter()
+        self.deadline = self.started + time_limit if time_limit else None
+        self.found = 0
+        self.solution = None
+        self.nodes = 0
+        self.subtrees = deque()
+
+    def remaining(self):
+        """剩余的时间预算（秒），没有时间限制时为 None；已经用完时抛出 SolveTimeout"""
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - time.perf_counter()
+        if remaining <= 0:
+            self.expire()
+        return remaining
+
+    def quantum(self, quantum):
+        """下一个子树的节点配额，不超过剩余的节点预算"""
+        if self.max_nodes is None:
+            return quantum
+        return max(1, min(quantum, self.max_nodes - self.nodes))
+
+    def expire(self):
+        raise SolveTimeout(self.nodes, time.perf_counter() - self.started)
+
+    def add(self, result):
+        """合并一个子树的搜索结果，已经找到 limit 个解时返回 True"""
+        found, solution, rest, nodes, timed_out = result
+        self.nodes += nodes
+        self.found += found
+        if self.solution is None:
+            self.solution = solution
+        if self.found >= self.limit:
+            return True
+        if timed_out or (self.max_nodes is not None and self.nodes > self.max_nodes):
+            self.expire()
+        if rest:
+            # 放到队首并保持顺序，整体上仍按顺序搜索的次序推进
+            self.subtrees.extendleft(reversed(rest))
+        return False
+
+
+class ParallelSolver:
+    """
+    与 SudokuSolver 接口相同（solve_cells/solve/count_solutions_cells/count_solutions）的并行求解器，
+    子树在 executor（ProcessPoolExecutor）中搜索，一次求解同时最多有 workers 个子树在进程池中。
+    local_nodes 为 0 时第一个节点起就交给进程池（用于不应在当前进程做 CPU 计算的场合，如 ASGI 主进程）。
+    time_limit/max_nodes 是整次求解的总预算（max_nodes 为各进程访问节点数之和）；
+    stats 只记录节点数和耗时，CPU 时间只包含当前进程
+    """
+
+    def __init__(self, executor, workers, quantum=QUANTUM, local_nodes=LOCAL_NODES):
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.quantum = quantum
+        self.local_nodes = local_nodes
+
+    def _search(self, cells, limit, time_limit, max_nodes, stats):
+        wall, cpu = time.perf_counter(), time.process_time()
+        search = _Search(limit, time_limit, max_nodes)
+        running = set()
+        try:
+            if self.local_nodes:
+                if search.add(search_subtree(cells, limit, search.quantum(self.local_nodes), time_limit)):
+                    return search
+            else:
+                search.subtrees.append(cells)
+            while search.subtrees or running:
+                while search.subtrees and len(running) < self.workers:
+                    running.add(self.executor.submit(search_subtree, search.subtrees.popleft(),
+                                                     limit - search.found, search.quantum(self.quantum),
+                                                     search.remaining()))
+                done, running = wait(running, timeout=search.remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    search.expire()
+                for future in done:
+                    if search.add(future.result()):
+                        return search
+            return search
+        except SolveTimeout as e:
+            e.solution = search.solution
+            raise
+        finally:
+            for future in running:
+                future.cancel()
+            if stats is not None:
+                stats.nodes += search.nodes
+                stats.wall_time += time.perf_counter() - wall
+                stats.cpu_time += time.process_time() - cpu
+
+    def solve_cells(self, cells, time_limit=None, max_nodes=None, stats=None):
+        """在扁平盘面上求解，返回解（bytes），无解时返回 None；超出预算时抛出 SolveTimeout"""
+        return self._search(bytes(cells), 1, time_limit, max_nodes, stats).solution
+
+    def solve(self, board, time_limit=None, max_nodes=None, stats=None):
+        """求解 N×N 题目，返回新的解（嵌套列表），无解时返回 None；board 不会被修改"""
+        solution = self.solve_cells(board_to_cells(board), time_limit, max_nodes, stats)
+        return None if solution is None else cells_to_board(solution)
+
+    def count_solutions_cells(self, cells, limit=2, time_limit=None, max_nodes=None, stats=None):
+        """
+        统计扁平盘面的解的个数，找到 limit 个解后立即停止，返回 (解的个数, 第一个解或 None)。
+        超出预算时抛出 SolveTimeout，其 solution 为超时前已经找到的一个解
+        """
+        search = self._search(bytes(cells), limit, time_limit, max_nodes, stats)
+        return search.found, search.solution
+
+    def count_solutions(self, board, limit=2, time_limit=None, max_nodes=None, stats=None):
+        """统计解的个数，找到 limit 个解后立即停止；board 不会被修改"""
+        return self.count_solutions_cells(board_to_cells(board), limit, time_limit, max_nodes, stats)[0]
@@ -0,0 +1,242 @@
+"""
+紧凑的二进制题库格式
+
+每个格子 4 位，一个题目 41 字节（81 个半字节，最后半个字节补0），
+而 JSON 嵌套列表每题约 250 字节且必须整体解析。
+
+文件布局（小端）::
+
+    0   4s   magic  b'SDKP'
+    4   u2   版本号（1）
+    6   u2   标志位：bit0 有解列，bit1 有难度列
+    8   u8   题目数 count
+    16  16s  保留
+    32       题目列      count × 41 字节
+             解列（可选）count × 41 字节，未解出的题目为全0
+             难度列（可选）count × float32
+
+各列起始位置按 8 字节对齐。读写都通过 NumPy memmap，切片不复制数据，
+只有调用 unpack/grids 时才解包所需的那一段，整个过程不构建 Python 列表。
+
+用法::
+
+    write_puzzle_file('hard.sdk', puzzles)                 # puzzles: (N, 9, 9) 或 (N, 81) uint8
+    pf = open_puzzle_file('hard.sdk')
+    grids = pf.grids(1000, 2000)                           # (1000, 9, 9) uint8
+
+    python puzzle_format.py to-binary puzzles.txt puzzles.sdk
+    python puzzle_format.py to-text puzzles.sdk puzzles.txt
+"""
+import argparse
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'SDKP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ16s')
+HEADER_SIZE = HEADER.size  # 32
+PACKED_SIZE = 41
+
+FLAG_SOLUTIONS = 1
+FLAG_DIFFICULTY = 2
+
+# 文本格式中格子的字符：'0'（或 '.'）为空格，1-9 为数字本身，10-25 依次为 A-P（其他尺寸的盘面，
+# 二进制格式只支持 9x9）
+CELL_CHARS = b'0123456789ABCDEFGHIJKLMNOP'
+# 文本格式与格子数值之间的转换表，其他字符保持原值（必然大于 25）以便检查
+_DECODE = bytes.maketrans(b'.' + CELL_CHARS, bytes([0]) + bytes(range(len(CELL_CHARS))))
+_ENCODE = bytes.maketrans(bytes(range(len(CELL_CHARS))), CELL_CHARS)
+
+
+def pack(grids):
+    """(N, 81) 或 (N, 9, 9) 的 uint8 盘面 -> (N, 41) 的打包数组"""
+    grids = np.asarray(grids, dtype=np.uint8).reshape(-1, 81)
+    if (grids > 9).any():
+        raise ValueError('题目中存在大于9的数字')
+    padded = np.zeros((len(grids), PACKED_SIZE * 2), dtype=np.uint8)
+    padded[:, :81] = grids
+    return (padded[:, 0::2] << 4) | padded[:, 1::2]
+
+
+def unpack(packed):
+    """(N, 41) 的打包数组 -> (N, 81) 的 uint8 盘面"""
+    packed = np.asarray(packed, dtype=np.uint8)
+    out = np.empty((len(packed), PACKED_SIZE * 2), dtype=np.uint8)
+    out[:, 0::2] = packed >> 4
+    out[:, 1::2] = packed & 0xF
+    return out[:, :81]
+
+
+def _layout(count, flags):
+    """返回各列的起始偏移和文件总大小"""
+    def align(offset):
+        return (offset + 7) & ~7
+
+    offsets = {'puzzles': HEADER_SIZE}
+    end = HEADER_SIZE + count * PACKED_SIZE
+    if flags & FLAG_SOLUTIONS:
+        offsets['solutions'] = align(end)
+        end = offsets['solutions'] + count * PACKED_SIZE
+    if flags & FLAG_DIFFICULTY:
+        offsets['difficulty'] = align(end)
+        end = offsets['difficulty'] + count * 4
+    return offsets, end
+
+
+class PuzzleFile:
+    """
+    以 memmap 打开的二进制题库。
+    puzzles/solutions 为 (count, 41) 的 uint8 memmap，difficulty 为 (count,) 的 float32 memmap；
+    没有对应的列时为 None
+    """
+
+    def __init__(self, path, mode='r'):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise ValueError('文件太短，不是二进制题库')
+        magic, version, flags, count, _ = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError('文件头不正确，不是二进制题库')
+        if version != VERSION:
+            raise ValueError(f'不支持的版本: {version}')
+        self.path = path
+        self.count = count
+        self.flags = flags
+        offsets, _ = _layout(count, flags)
+
+        def column(name, dtype, shape):
+            if name not in offsets or count == 0:
+                return np.zeros(shape, dtype=dtype) if name in offsets else None
+            return np.memmap(path, dtype=dtype, mode=mode, offset=offsets[name], shape=shape)
+
+        self.puzzles = column('puzzles', np.uint8, (count, PACKED_SIZE))
+        self.solutions = column('solutions', np.uint8, (count, PACKED_SIZE))
+        self.difficulty = column('difficulty', np.float32, (count,))
+
+    def __len__(self):
+        return self.count
+
+    def grids(self, start=0, stop=None):
+        """解包 [start, stop) 范围内的题目，返回 (n, 9, 9) uint8"""
+        return unpack(self.puzzles[start:stop]).reshape(-1, 9, 9)
+
+    def solution_grids(self, start=0, stop=None):
+        """解包 [start, stop) 范围内的解，返回 (n, 9, 9) uint8，未解出的为全0"""
+        if self.solutions is None:
+            raise ValueError('该文件没有解列')
+        return unpack(self.solutions[start:stop]).reshape(-1, 9, 9)
+
+    def iter_chunks(self, chunk_size=65536):
+        """按块产出 (起始序号, (n, 9, 9) 题目)"""
+        for start in range(0, self.count, chunk_size):
+            yield start, self.grids(start, start + chunk_size)
+
+    def flush(self):
+        for column in (self.puzzles, self.solutions, self.difficulty):
+            if isinstance(column, np.memmap):
+                column.flush()
+
+
+def create_puzzle_file(path, count, with_solutions=False, with_difficulty=False):
+    """创建一个可写的空题库（所有列为0），返回以 'r+' 打开的 PuzzleFile，供按块填充"""
+    flags = (FLAG_SOLUTIONS if with_solutions else 0) | (FLAG_DIFFICULTY if with_difficulty else 0)
+    _, size = _layout(count, flags)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, count, bytes(16)))
+        f.truncate(size)
+    return PuzzleFile(path, mode='r+')
+
+
+def open_puzzle_file(path, mode='r'):
+    return PuzzleFile(path, mode)
+
+
+def write_puzzle_file(path, puzzles, solutions=None, difficulty=None):
+    """把 (N, 9, 9)/(N, 81) 的题目（以及可选的解和难度）写成二进制题库"""
+    puzzles = np.asarray(puzzles, dtype=np.uint8).reshape(-1, 81)
+    pf = create_puzzle_file(path, len(puzzles), solutions is not None, difficulty is not None)
+    if len(puzzles):
+        pf.puzzles[:] = pack(puzzles)
+        if solutions is not None:
+            pf.solutions[:] = pack(solutions)
+        if difficulty is not None:
+            pf.difficulty[:] = np.asarray(difficulty, dtype=np.float32)
+    pf.flush()
+    return pf
+
+
+def parse_lines(lines, start=0):
+    """
+    81 字符的题目行（bytes 或 str）-> (N, 81) uint8。
+    格式错误时抛出 ValueError，错误信息中的题目序号从 start + 1 开始计
+    """
+    lines = [line.encode() if isinstance(line, str) else line for line in lines]
+    for i, line in enumerate(lines):
+        if len(line) != 81:
+            raise ValueError(f'第 {start + i + 1} 个题目不是81个字符')
+    grids = np.frombuffer(b''.join(lines).translate(_DECODE), dtype=np.uint8).reshape(-1, 81)
+    bad = np.nonzero((grids > 9).any(axis=1))[0]
+    if len(bad):
+        raise ValueError(f'第 {start + int(bad[0]) + 1} 个题目中存在无效的字符')
+    return grids
+
+
+def format_lines(grids):
+    """(N, 81) uint8 -> 每行一个题目的 bytes"""
+    grids = np.ascontiguousarray(grids, dtype=np.uint8).reshape(-1, 81)
+    rows = np.concatenate([grids, np.full((len(grids), 1), ord('\n'), dtype=np.uint8)], axis=1)
+    return rows.tobytes().translate(_ENCODE)
+
+
+def text_to_binary(input_path, output_path, chunk_size=65536):
+    """把 81 字符每行的文本题库转换为二进制格式（先数行数，再按块填充），返回题目数"""
+    with open(input_path, 'rb') as f:
+        count = sum(1 for line in f if line.strip())
+    pf = create_puzzle_file(output_path, count)
+    index = 0
+    with open(input_path, 'rb') as f:
+        lines = []
+        for line in f:
+            line = line.strip()
+            if line:
+                lines.append(line)
+            if len(lines) >= chunk_size:
+                pf.puzzles[index:index + len(lines)] = pack(parse_lines(lines, index))
+                index += len(lines)
+                lines = []
+        if lines:
+            pf.puzzles[index:index + len(lines)] = pack(parse_lines(lines, index))
+    pf.flush()
+    return count
+
+
+def binary_to_text(input_path, output_path, chunk_size=65536):
+    """把二进制题库转换回 81 字符每行的文本格式，返回题目数"""
+    pf = open_puzzle_file(input_path)
+    with open(output_path, 'wb') as f:
+        for _, grids in pf.iter_chunks(chunk_size):
+            f.write(format_lines(grids))
+    return len(pf)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='文本题库与二进制题库之间的转换')
+    parser.add_argument('command', choices=('to-binary', 'to-text'))
+    parser.add_argument('input')
+    parser.add_argument('output')
+    args = parser.parse_args(argv)
+    convert = text_to_binary if args.command == 'to-binary' else binary_to_text
+    try:
+        count = convert(args.input, args.output)
+    except ValueError as e:
+        print(f'转换失败：{e}', file=sys.stderr)
+        return 1
+    print(f'已转换 {count} 个题目', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
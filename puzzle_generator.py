@@ -0,0 +1,266 @@
+"""
+唯一解题目生成器
+
+先用对角线上三个互不影响的宫格随机填数再求解，得到随机的完整盘面；
+再按随机顺序逐个挖去数字，每挖一个都检查题目仍然只有一个解。
+
+唯一性检查是增量的：已知原来的唯一解中该格为 v，挖去后题目仍唯一，当且仅当
+“剩余数字 + 该格不等于 v”无解。因此只需在剩余数字传播后的盘面上，依次试该格的其他候选数，
+每次只找一个解；多数情况下传播直接推出该格为 v，或者其他候选数立即矛盾，不需要搜索。
+挖不掉的格子以后也不可能再挖掉（数字越少解越多），所以每个格子只检查一次。
+
+纯 Python 下每个新题目需要几十毫秒。命令行需要大量测试数据时可以让每个新题目再派生 variants-1 个
+随机对称变换（数字重新编号、行列置换、转置），变换后的题目解的个数和逻辑难度都不变，几乎没有开销，
+但本质上仍是同一道题，因此 /generate 不使用。hard/expert 按本引擎的回溯次数划分，与搜索顺序有关，
+变换后可能落到相邻的档位，这两档的变换会重新判断难度，不符合的丢弃。
+
+难度档位：
+- easy：只靠裸单/隐单传播即可解出，保留 EASY_CLUES 个以上的数字
+- medium：只靠传播即可解出，尽量挖到最少
+- hard：挖到极小（再挖任何一个都不唯一），并且必须猜测才能解出
+- expert：同 hard，且回溯次数达到 EXPERT_BACKTRACKS
+
+用法::
+
+    generate_puzzles('hard', 100)                  # -> [81字符题目, ...]
+    python puzzle_generator.py hard 10000 -o hard.txt --workers 8
+    python puzzle_generator.py medium 100000 -o medium.txt --variants 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from puzzle_format import _ENCODE
+from sudoku_solver import SolveStats, _BitmaskSearch, _InstrumentedSearch, geometry, geometry_for_cells
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+
+# easy 档保留的最少数字数
+EASY_CLUES = 36
+# expert 档要求的最少回溯次数（随机的极小题目中约一成达到）
+EXPERT_BACKTRACKS = 4
+# 每个题目最多尝试的完整盘面数，超过时抛出 RuntimeError
+MAX_ATTEMPTS = 1000
+# 服务端单次请求各档位最多生成的题目数（各约 10 CPU 秒；expert 每题约 0.5~1 秒），命令行不受限制
+MAX_COUNTS = {'easy': 1000, 'medium': 500, 'hard': 100, 'expert': 10}
+# 各档位每块的新题目数（每块约 1 CPU 秒），慢的档位分得更细，多个进程可以同时生成
+CHUNK_SIZES = {'easy': 64, 'medium': 32, 'hard': 8, 'expert': 1}
+
+
+def random_solution(rng, box=3):
+    """
+    随机的完整盘面（N² 字节，N = box²）：对角线上的宫格互不影响，各填一个随机排列后求解。
+    box 不为 3 时用于生成其他尺寸的测试盘面
+    """
+    g = geometry(box)
+    n = g.n
+    while True:
+        cells = bytearray(g.size)
+        for b in range(box):
+            top = left = b * box
+            digits = rng.sample(range(1, n + 1), n)
+            for k in range(n):
+                cells[(top + k // box) * n + left + k % box] = digits[k]
+        engine = _BitmaskSearch(geometry=g)
+        engine.load(cells)
+        engine.run(1)
+        # 4×4 的对角宫格组合有时无解，重新随机即可
+        if engine.solution is not None:
+            return engine.solution
+
+
+def solvable_by_singles(cells, engine=None):
+    """只用裸单/隐单传播能否填满盘面（能填满时解必然唯一）"""
+    engine = engine or _BitmaskSearch(geometry=geometry_for_cells(len(cells)))
+    engine.undo(0)
+    return engine.load(cells) and engine.propagate(0) and engine.tlen == len(cells)
+
+
+def unique_without(cells, idx, value, engine=None):
+    """
+    cells 是唯一解题目挖去 idx 格（原值 value）后的盘面，检查它是否仍然只有一个解。
+    只需确认 idx 格取其他数字时都无解
+    """
+    engine = engine or _BitmaskSearch(geometry=geometry_for_cells(len(cells)))
+    engine.undo(0)
+    if not engine.load(cells) or not engine.propagate(0):
+        return True
+    if engine.cells[idx]:
+        # 传播已经推出该格的值
+        return engine.cells[idx] == value
+    mark = engine.tlen
+    others = engine.candidates(idx) & ~(1 << (value - 1))
+    while others:
+        bit = others & -others
+        others ^= bit
+        engine.place(idx, engine.geometry.digit_of_bit[bit])
+        engine.solution = None
+        found = engine.run(1)
+        engine.undo(mark)
+        if found:
+            return False
+    return True
+
+
+def dig(solution, rng, min_clues=0, singles_only=False):
+    """
+    从完整盘面按随机顺序挖去数字并保持唯一解，直到剩下 min_clues 个数字或没有可挖的格子。
+    singles_only 为 True 时还要求题目始终只靠传播即可解出。返回 81 字节的题目
+    """
+    cells = bytearray(solution)
+    engine = _BitmaskSearch(geometry=geometry_for_cells(len(cells)))
+    clues = len(cells)
+    for idx in rng.sample(range(clues), clues):
+        if clues <= min_clues:
+            break
+        value = cells[idx]
+        cells[idx] = 0
+        if singles_only:
+            keep = solvable_by_singles(cells, engine)
+        else:
+            keep = unique_without(cells, idx, value, engine)
+        if keep:
+            clues -= 1
+        else:
+            cells[idx] = value
+    return bytes(cells)
+
+
+def rate(cells):
+    """用带统计的搜索引擎解一遍，返回 SolveStats（nodes、guesses、backtracks 等）"""
+    stats = SolveStats()
+    engine = _InstrumentedSearch(None, stats)
+    engine.load(cells)
+    engine.run(1)
+    return stats
+
+
+def classify(cells):
+    """按上面的档位定义判断已知唯一解题目的难度"""
+    if solvable_by_singles(cells):
+        return 'easy' if 81 - cells.count(0) >= EASY_CLUES else 'medium'
+    return 'expert' if rate(cells).backtracks >= EXPERT_BACKTRACKS else 'hard'
+
+
+class GenerationTimeout(RuntimeError):
+    """生成题目超出时间预算"""
+
+
+def generate(difficulty, rng, deadline=None):
+    """
+    生成一个指定难度的唯一解题目，返回 81 字节的题目。
+    deadline 为 time.time() 的截止时刻，每次尝试前检查，超过时抛出 GenerationTimeout
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f'未知的难度: {difficulty}')
+    for _ in range(MAX_ATTEMPTS):
+        if deadline is not None and time.time() > deadline:
+            raise GenerationTimeout(f'生成 {difficulty} 难度的题目超出时间预算')
+        solution = random_solution(rng)
+        if difficulty == 'easy':
+            return dig(solution, rng, min_clues=rng.randint(EASY_CLUES, EASY_CLUES + 4), singles_only=True)
+        if difficulty == 'medium':
+            puzzle = dig(solution, rng, singles_only=True)
+            if 81 - puzzle.count(0) < EASY_CLUES:
+                return puzzle
+            continue
+        puzzle = dig(solution, rng)
+        if classify(puzzle) == difficulty:
+            return puzzle
+    raise RuntimeError(f'尝试 {MAX_ATTEMPTS} 次仍未生成 {difficulty} 难度的题目')
+
+
+def shuffle(cells, rng):
+    """随机对称变换：数字重新编号、带/栈及带内行/栈内列的排列、转置"""
+    mapping = [0] + rng.sample(range(1, 10), 9)
+
+    def lines():
+        return [b * 3 + k for b in rng.sample(range(3), 3) for k in rng.sample(range(3), 3)]
+
+    rows, cols = lines(), lines()
+    if rng.random() < 0.5:
+        return bytes(mapping[cells[c * 9 + r]] for r in rows for c in cols)
+    return bytes(mapping[cells[r * 9 + c]] for r in rows for c in cols)
+
+
+def format_puzzle(cells):
+    """N² 字节题目 -> N² 字符字符串，空格为 '0'，10-25 为 A-P（见 puzzle_format.CELL_CHARS）"""
+    return bytes(cells).translate(_ENCODE).decode()
+
+
+def generate_chunk(difficulty, count, seed=None, variants=1, deadline=None):
+    """
+    生成 count 个题目（81 字符字符串列表），每个新题目派生 variants-1 个对称变换，供进程池调用。
+    deadline 同 generate，进程间共用同一个截止时刻
+    """
+    rng = random.Random(seed)
+    puzzles = []
+    while len(puzzles) < count:
+        puzzle = generate(difficulty, rng, deadline)
+        puzzles.append(format_puzzle(puzzle))
+        for _ in range(min(variants, count - len(puzzles) + 1) - 1):
+            variant = shuffle(puzzle, rng)
+            if difficulty in ('easy', 'medium') or classify(variant) == difficulty:
+                puzzles.append(format_puzzle(variant))
+    return puzzles
+
+
+def plan_chunks(count, seed=None, variants=1, chunk_size=16):
+    """
+    把 count 个题目分成若干块，返回 [(题目数, 种子), ...]，每块约含 chunk_size 个新题目
+    （chunk_size 可以是难度对应的 CHUNK_SIZES[difficulty]）
+    """
+    seeds = random.Random(seed)
+    chunk_size *= max(1, variants)
+    return [(min(chunk_size, count - start), seeds.getrandbits(64)) for start in range(0, count, chunk_size)]
+
+
+def generate_puzzles(difficulty, count, seed=None, executor=None, variants=1, chunk_size=16, time_limit=None):
+    """
+    生成 count 个指定难度的题目，返回 81 字符字符串列表。
+    给出 executor 时按块分发到进程池；seed 相同时结果相同。
+    time_limit（秒）为整次生成的时间预算，超出时抛出 GenerationTimeout，尚未开始的块被取消
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f'未知的难度: {difficulty}')
+    deadline = time.time() + time_limit if time_limit else None
+    chunks = plan_chunks(count, seed, variants, chunk_size)
+    if executor is None:
+        results = [generate_chunk(difficulty, n, s, variants, deadline) for n, s in chunks]
+    else:
+        futures = [executor.submit(generate_chunk, difficulty, n, s, variants, deadline) for n, s in chunks]
+        try:
+            results = [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+    return [puzzle for chunk in results for puzzle in chunk]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成唯一解的数独题目，每行一个 81 字符题目')
+    parser.add_argument('difficulty', choices=DIFFICULTIES)
+    parser.add_argument('count', type=int)
+    parser.add_argument('-o', '--output', help='输出文件（默认为标准输出）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认为CPU核数）')
+    parser.add_argument('--variants', type=int, default=1,
+                        help='每个新题目派生的题目数（含自身，其余为对称变换），默认1')
+    args = parser.parse_args(argv)
+
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as executor:
+        puzzles = generate_puzzles(args.difficulty, args.count, args.seed, executor, args.variants)
+    text = ''.join(p + '\n' for p in puzzles)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+预生成题目池
+
+每个难度档位各维护一个有界的题目队列，后台线程在队列不满时调用 puzzle_generator 补充，
+取题只是一次 popleft，不会因为现场生成题目而等待；池暂时为空时返回 None，由调用方使用默认题目。
+
+池中的题目在进程退出时（atexit）以及每次补满后写入 JSON 文件，下次启动时先载入，
+因此重启后“加载示例”也能立即拿到题目。
+
+用法::
+
+    pool = get_pool()                  # 进程内共用一个题目池，首次调用时载入并启动后台补充
+    board = pool.take_board('hard')    # 9x9 列表，池为空时为 None
+"""
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+from collections import deque
+
+from puzzle_generator import DIFFICULTIES, format_puzzle, generate
+from sudoku_solver import cells_to_board
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'puzzle_pool.json')
+# 补充出错（生成失败、写文件失败）后等待多久再重试（秒）
+RETRY_DELAY = 5
+
+
+class PuzzlePool:
+    """按难度分档的有界题目池，题目为 81 字符字符串"""
+
+    def __init__(self, path=None, capacity=50, difficulties=DIFFICULTIES, seed=None):
+        self.path = path
+        self.capacity = capacity
+        self.difficulties = tuple(difficulties)
+        self._queues = {d: deque(maxlen=capacity) for d in self.difficulties}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def sizes(self):
+        return {d: len(q) for d, q in self._queues.items()}
+
+    def take(self, difficulty):
+        """取出一个题目（81 字符字符串），池为空时返回 None；取出后唤醒后台线程补充"""
+        if difficulty not in self._queues:
+            raise ValueError(f'未知的难度: {difficulty}')
+        with self._lock:
+            puzzle = self._queues[difficulty].popleft() if self._queues[difficulty] else None
+        self._wakeup.set()
+        return puzzle
+
+    def take_board(self, difficulty):
+        """与 take 相同，返回 9x9 列表"""
+        puzzle = self.take(difficulty)
+        return None if puzzle is None else cells_to_board([int(ch) for ch in puzzle])
+
+    def put(self, difficulty, puzzle):
+        with self._lock:
+            self._queues[difficulty].append(puzzle)
+
+    # ---- 持久化 ----
+
+    def load(self):
+        """从文件载入题目，文件不存在或损坏时保持为空，返回载入的题目数"""
+        if not self.path:
+            return 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        loaded = 0
+        for difficulty, puzzles in saved.items():
+            if difficulty not in self._queues or not isinstance(puzzles, list):
+                continue
+            for puzzle in puzzles[:self.capacity]:
+                if isinstance(puzzle, str) and len(puzzle) == 81 and puzzle.isdigit():
+                    self.put(difficulty, puzzle)
+                    loaded += 1
+        return loaded
+
+    def save(self):
+        """把当前的题目写入文件（先写临时文件再替换）"""
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {d: list(q) for d, q in self._queues.items()}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+    # ---- 后台补充 ----
+
+    def start(self):
+        """启动后台补充线程，并注册退出时保存"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill, name='puzzle-pool', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """停止后台线程并保存题目"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.save()
+
+    def _next_difficulty(self):
+        """题目最少的未满档位，全部已满时返回 None"""
+        sizes = [(len(self._queues[d]), d) for d in self.difficulties if len(self._queues[d]) < self.capacity]
+        return min(sizes)[1] if sizes else None
+
+    def _refill(self):
+        while not self._stopped.is_set():
+            # 任何异常都不能让后台线程退出，否则池再也不会补充
+            try:
+                self._refill_once()
+            except Exception as e:
+                print(f'题目池补充失败：{e!r}，{RETRY_DELAY} 秒后重试', file=sys.stderr, flush=True)
+                self._stopped.wait(RETRY_DELAY)
+
+    def _refill_once(self):
+        difficulty = self._next_difficulty()
+        if difficulty is None:
+            self.save()
+            self._wakeup.wait()
+            self._wakeup.clear()
+            return
+        self.put(difficulty, format_puzzle(generate(difficulty, self._rng)))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    进程内共用的题目池，首次调用时从 PUZZLE_POOL_PATH（默认 data/puzzle_pool.json）载入并启动后台补充。
+    每档容量由 PUZZLE_POOL_SIZE 配置，默认 50
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PuzzlePool(os.environ.get('PUZZLE_POOL_PATH', DEFAULT_PATH),
+                               int(os.environ.get('PUZZLE_POOL_SIZE', 50)))
+            _pool.load()
+            _pool.start()
+    return _pool
@@ -0,0 +1,164 @@
+"""
+数独解缓存
+
+以 81 个字符的题目字符串为键（空格为 '0'，按行展开；原样和对称规范形式两种键），
+内存中用 OrderedDict 做容量受限的 LRU 缓存，并统计命中/未命中次数。
+可选地以本地 sqlite 文件作为后备存储，进程重启后缓存依然有效。
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from sudoku_solver import SearchBudget, SolveTimeout, _BitmaskSearch, board_to_cells
+from sudoku_symmetry import apply_inverse, canonicalize
+
+# 缓存中表示"无解"的值
+NO_SOLUTION = ''
+
+
+def puzzle_key(board):
+    """把 9x9 的题目转换为 81 个字符的规范字符串"""
+    if len(board) != 9 or any(len(row) != 9 for row in board):
+        raise ValueError('题目必须是 9x9 的网格')
+    key = ''.join(str(v) for row in board for v in row)
+    if len(key) != 81:
+        raise ValueError('题目中存在无效的数字')
+    return key
+
+
+def key_to_board(key):
+    """把 81 个字符的字符串还原为 9x9 的列表"""
+    return [[int(ch) for ch in key[r * 9:r * 9 + 9]] for r in range(9)]
+
+
+class SolutionCache:
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL)'
+            )
+            self._db.commit()
+
+    def get(self, key, count_miss=True):
+        """
+        返回缓存的解字符串，无解时返回 NO_SOLUTION，未命中时返回 None。
+        一次求解要查多个键时，前面的查询传 count_miss=False，最后没有命中再调用 record_miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute('SELECT solution FROM solutions WHERE puzzle = ?', (key,)).fetchone()
+                if row is not None:
+                    self._store(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?)', (key, value))
+                self._db.commit()
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+
+def store_solution(cache, board, solution):
+    """
+    把在 solve_with_cache 之外求出的结果（扁平盘面 bytes，无解时为 None）按题目原样写入缓存，
+    例如 unique 模式计数搜索找到的第一个解；只处理 9x9
+    """
+    if len(board) == 9:
+        cache.put(puzzle_key(board), NO_SOLUTION if solution is None else ''.join(str(v) for v in solution))
+
+
+def _solve_by_propagation(board):
+    """
+    只在根节点做约束传播：能填满盘面时返回解字符串（此时解必然唯一），传播出现矛盾时返回 NO_SOLUTION，
+    需要搜索时返回 None。代价与简单题目的一次求解相当，远低于规范化
+    """
+    engine = _BitmaskSearch(SearchBudget(max_nodes=1))
+    if not engine.load(board_to_cells(board)):
+        return NO_SOLUTION
+    try:
+        engine.run(1)
+    except SolveTimeout:
+        return None
+    return NO_SOLUTION if engine.solution is None else ''.join(str(v) for v in engine.solution)
+
+
+def solve_with_cache(board, solver, cache, time_limit=None, max_nodes=None, stats=None):
+    """
+    先查缓存再求解。返回解（嵌套列表），无解时返回 None。
+    先按题目原样查缓存；未命中时，只靠传播就能解出的题目直接求解，
+    需要搜索的题目再按对称规范形式查缓存，等价题目（转置、行列/带栈交换、数字重新编号）共用一次求解。
+    规范化约需 0.5 毫秒，比简单题目的一次求解还慢，因此只用在需要搜索的题目上。
+    结果同时按原样和规范形式写入缓存。其他尺寸的题目不经过缓存直接求解。
+    超出求解预算时抛出 SolveTimeout，且不写入缓存。board 不会被修改。
+    stats 为 SolveStats 实例时收集搜索统计，命中缓存时只把 stats.cached 置为 True
+    """
+    if len(board) != 9:
+        return solver.solve(board, time_limit=time_limit, max_nodes=max_nodes, stats=stats)
+    key = puzzle_key(board)  # 同时校验题目格式
+    value = cache.get(key, count_miss=False)
+    if value is not None:
+        if stats is not None:
+            stats.cached = True
+        return None if value == NO_SOLUTION else key_to_board(value)
+
+    value = _solve_by_propagation(board)
+    if value is not None:
+        cache.record_miss()
+        if stats is not None:
+            # 统计只在请求时才收集，这里用所选求解器再解一次以得到它的统计
+            solver.solve(board, time_limit=time_limit, max_nodes=max_nodes, stats=stats)
+    else:
+        canonical, transform = canonicalize(board)
+        canonical_key = puzzle_key(canonical)
+        value = cache.get(canonical_key, count_miss=False)
+        if value is None:
+            cache.record_miss()
+            solution = solver.solve(canonical, time_limit=time_limit, max_nodes=max_nodes, stats=stats)
+            value = NO_SOLUTION if solution is None else puzzle_key(solution)
+            cache.put(canonical_key, value)
+        elif stats is not None:
+            stats.cached = True
+        if value != NO_SOLUTION:
+            value = puzzle_key(apply_inverse(transform, key_to_board(value)))
+    cache.put(key, value)
+    return None if value == NO_SOLUTION else key_to_board(value)
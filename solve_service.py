@@ -0,0 +1,148 @@
+"""
+/solve、/generate 请求的处理逻辑
+
+Flask 应用（web_app.py）和 ASGI 生产入口（asgi_app.py）共用这里的校验和求解流程，
+保证两者的请求/响应 JSON 格式完全一致。
+"""
+from puzzle_generator import DIFFICULTIES, MAX_COUNTS
+from solution_cache import solve_with_cache, store_solution
+from sudoku_solver import (BOARD_SIDES, SOLVER_NAMES, SolveStats, SolveTimeout, board_to_cells, cells_to_board,
+                           find_conflicts, get_solver)
+
+SOLVE_MODES = ('solve', 'unique')
+# unique 模式下 limit（最多数到的解的个数）的上限；至少要数到 2 个才能判断唯一性
+MAX_SOLUTION_LIMIT = 100
+
+
+def is_board(puzzle):
+    """检查是否为 N×N（N 为 4、9、16 或 25）、数字在 0..N 之间的整数列表"""
+    if not isinstance(puzzle, list) or len(puzzle) not in BOARD_SIDES:
+        return False
+    n = len(puzzle)
+    return all(
+        isinstance(row, list) and len(row) == n
+        and all(isinstance(v, int) and not isinstance(v, bool) and 0 <= v <= n for v in row)
+        for row in puzzle
+    )
+
+
+def validate_solve_request(data):
+    """检查 /solve 的请求体，不合法时返回错误信息，合法时返回 None"""
+    if not data or not isinstance(data, dict) or 'puzzle' not in data:
+        return 'Invalid request data'
+    puzzle = data['puzzle']
+    solver_name = data.get('solver', 'backtracking')
+    mode = data.get('mode', 'solve')
+    if not is_board(puzzle):
+        return 'Invalid puzzle format'
+    if solver_name not in SOLVER_NAMES:
+        return f'Unknown solver: {solver_name}'
+    if mode not in SOLVE_MODES:
+        return f'Unknown mode: {mode}'
+    limit = data.get('limit', 2)
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 2 <= limit <= MAX_SOLUTION_LIMIT:
+        return f'limit must be an integer between 2 and {MAX_SOLUTION_LIMIT}'
+    return None
+
+
+def check_conflicts(puzzle):
+    """
+    搜索前检查题目本身是否矛盾（重复的已给数字、没有候选数的空格等），
+    矛盾时返回 status 为 "invalid" 的响应（conflicts 为 [行, 列] 列表），否则返回 None
+    """
+    conflict = find_conflicts(board_to_cells(puzzle))
+    if conflict is None:
+        return None
+    reason, cells = conflict
+    n = len(puzzle)
+    return {'solution': [], 'status': 'invalid', 'reason': reason, 'conflicts': [[i // n, i % n] for i in cells]}
+
+
+def conflict_response(data, with_stats=False):
+    """已通过校验的 /solve 请求中题目本身矛盾时，返回完整的 invalid 响应，否则返回 None"""
+    response = check_conflicts(data['puzzle'])
+    if response is None:
+        return None
+    if data.get('mode', 'solve') == 'unique':
+        response.update(unique=False, solution_count=0)
+    if data.get('stats', with_stats):
+        response['stats'] = SolveStats().as_dict()
+    return response
+
+
+def solve_request(data, cache, budget, with_stats=False, parallel=None):
+    """
+    执行已通过校验的 /solve 请求，返回响应字典。
+    budget 为传给求解器的 time_limit/max_nodes 关键字参数；题目内容有误时抛出异常。
+    parallel 为 ParallelSolver 时用它代替回溯求解器（DLX 求解器不受影响）
+    """
+    puzzle = data['puzzle']
+    solver_name = data.get('solver', 'backtracking')
+    solver = parallel if parallel is not None and solver_name == 'backtracking' else get_solver(solver_name)
+    stats = SolveStats() if data.get('stats', with_stats) else None
+
+    # 题目本身矛盾时直接返回，不进入搜索
+    response = conflict_response(data, with_stats)
+    if response is not None:
+        return response
+
+    if data.get('mode', 'solve') == 'unique':
+        # 唯一性检查：一次计数搜索，最多数到 limit 个解即停止；记下的第一个解就是答案，并写入缓存
+        try:
+            count, solution = solver.count_solutions_cells(board_to_cells(puzzle), limit=data.get('limit', 2),
+                                                           stats=stats, **budget)
+        except SolveTimeout as e:
+            if e.solution is None:
+                return {'solution': [], 'status': 'timeout', 'stats': stats.as_dict() if stats else e.stats()}
+            # 已经求出一个解，但唯一性检查没能在预算内完成
+            store_solution(cache, puzzle, e.solution)
+            return {'solution': cells_to_board(e.solution), 'status': 'timeout',
+                    'stats': stats.as_dict() if stats else e.stats()}
+        store_solution(cache, puzzle, solution)
+        if solution is None:
+            response = {'solution': [], 'status': 'no_solution'}
+        else:
+            response = {'solution': cells_to_board(solution), 'status': 'solved'}
+        response['unique'] = count == 1
+        response['solution_count'] = count
+    else:
+        # 求解数独（优先从缓存中取解）
+        try:
+            solution = solve_with_cache(puzzle, solver, cache, stats=stats, **budget)
+        except SolveTimeout as e:
+            return {'solution': [], 'status': 'timeout', 'stats': stats.as_dict() if stats else e.stats()}
+        if solution is None:
+            response = {'solution': [], 'status': 'no_solution'}
+        else:
+            response = {'solution': solution, 'status': 'solved'}
+    if stats is not None:
+        response['stats'] = stats.as_dict()
+    return response
+
+
+def parse_generate_request(args, max_count):
+    """
+    检查 /generate 的查询参数（difficulty、count、seed），
+    返回 (错误信息, None) 或 (None, 参数字典)。
+    count 的上限为 max_count 和该难度的 MAX_COUNTS 中较小的一个
+    """
+    difficulty = args.get('difficulty', 'medium')
+    if difficulty not in DIFFICULTIES:
+        return f'Unknown difficulty: {difficulty}', None
+    try:
+        count = int(args.get('count', 1))
+        seed = int(args['seed']) if args.get('seed') else None
+    except ValueError:
+        return 'Invalid count or seed', None
+    max_count = min(max_count, MAX_COUNTS[difficulty])
+    if not 1 <= count <= max_count:
+        return f'count must be between 1 and {max_count}', None
+    return None, {'difficulty': difficulty, 'count': count, 'seed': seed}
+
+
+def generate_response(difficulty, puzzles):
+    """/generate 的响应：81 字符题目转换为与 /solve 相同的 9x9 列表"""
+    return {
+        'difficulty': difficulty,
+        'puzzles': [cells_to_board([int(ch) for ch in puzzle]) for puzzle in puzzles],
+    }
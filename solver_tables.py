@@ -0,0 +1,142 @@
+"""
+求解器下标表的预构建和磁盘快照
+
+sudoku_solver 的 Geometry（行/列/宫下标、同伴表、popcount 表）和 dlx_solver 的矩阵模板
+默认在第一次用到某种尺寸时才构建，9x9 只需不到 1 毫秒，16x16、25x25 合计约需 60 毫秒。
+服务启动时调用 precompute_tables 一次性构建好，第一个大盘面请求不再承担这部分开销；
+默认只预构建 9x9，其他尺寸会增加启动时间，按需通过 SOLVER_TABLE_SIDES 开启，最好同时使用快照。
+
+给出快照路径时先用 marshal 载入（约为重新构建的三分之一时间），缺少的尺寸构建后写回。
+快照与 Python 版本和表格式版本绑定，不匹配或损坏时直接重建；快照只包含整数、bytes 和列表。
+
+    precompute_tables(**tables_from_env())
+    python solver_tables.py data/solver_tables.bin      # 发布时预先生成快照
+"""
+import argparse
+import marshal
+import os
+import sys
+
+import dlx_solver
+import sudoku_solver
+from sudoku_solver import BOARD_SIDES, Geometry
+
+# 表的结构变化时递增，旧快照会被忽略
+FORMAT_VERSION = 1
+
+
+def tables_from_env():
+    """
+    从环境变量读取预构建配置：SOLVER_TABLE_SIDES（逗号分隔的盘面边长，默认只有 9，
+    需要快速处理其他尺寸时设为 4,9,16,25）和 SOLVER_TABLES_PATH（快照文件路径，默认不使用快照）
+    """
+    sides = os.environ.get('SOLVER_TABLE_SIDES')
+    return {
+        'sides': tuple(int(s) for s in sides.split(',') if s.strip()) if sides else (9,),
+        'path': os.environ.get('SOLVER_TABLES_PATH') or None,
+    }
+
+
+def _stamp():
+    return FORMAT_VERSION, marshal.version, tuple(sys.version_info[:2])
+
+
+def _geometry_state(g):
+    # 25x25 的 popcount/数字查找是对象而不是表，载入时重新创建
+    return {k: v for k, v in vars(g).items() if isinstance(v, (int, bytes, tuple, list))}
+
+
+def _restore_geometry(state):
+    g = Geometry.__new__(Geometry)
+    vars(g).update(state)
+    if g.n > 16:
+        g.bit_count = sudoku_solver._PopCount()
+        g.digit_of_bit = sudoku_solver._DigitOfBit()
+    return g
+
+
+def _template_state(template):
+    return {k: v for k, v in vars(template).items() if k != 'geometry'}
+
+
+def _restore_template(state, g):
+    template = dlx_solver._Template.__new__(dlx_solver._Template)
+    vars(template).update(state)
+    template.geometry = g
+    return template
+
+
+def load_snapshot(path, boxes):
+    """从快照中载入 boxes 中尚未构建的尺寸，返回载入的宫格边长集合；文件不可用时返回空集合"""
+    try:
+        # 整个文件读入后再解析，直接 marshal.load 文件对象时会逐块读取，慢十几倍
+        with open(path, 'rb') as f:
+            snapshot = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return set()
+    if not isinstance(snapshot, dict) or snapshot.get('stamp') != _stamp():
+        return set()
+    loaded = set()
+    for box in boxes:
+        entry = snapshot['tables'].get(box)
+        if entry is None:
+            continue
+        g = sudoku_solver._GEOMETRIES.setdefault(box, _restore_geometry(entry['geometry']))
+        dlx_solver._templates.setdefault(box, _restore_template(entry['dlx'], g))
+        loaded.add(box)
+    return loaded
+
+
+def save_snapshot(path, boxes):
+    """把 boxes 中各尺寸的表写入快照（先写临时文件再替换）"""
+    tables = {}
+    for box in boxes:
+        g = sudoku_solver.geometry(box)
+        tables[box] = {'geometry': _geometry_state(g), 'dlx': _template_state(dlx_solver._template(g))}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        marshal.dump({'stamp': _stamp(), 'tables': tables}, f)
+    os.replace(tmp_path, path)
+
+
+def precompute_tables(sides=BOARD_SIDES, path=None):
+    """
+    构建（或从快照载入）各尺寸的 Geometry 和 DLX 模板，
+    返回 {'snapshot': 从快照载入的尺寸数, 'built': 新构建的尺寸数}，已经构建过的尺寸不再处理。
+    path 不为空且快照缺少某些尺寸时，构建后写回快照；写入失败不影响启动
+    """
+    boxes = [_box_of_side(n) for n in sides]
+    missing = [box for box in boxes if box not in sudoku_solver._GEOMETRIES or box not in dlx_solver._templates]
+    loaded = load_snapshot(path, missing) if path and missing else set()
+    built = [box for box in missing if box not in loaded]
+    for box in built:
+        dlx_solver._template(sudoku_solver.geometry(box))
+    if path and built:
+        try:
+            save_snapshot(path, boxes)
+        except OSError:
+            pass
+    return {'snapshot': len(loaded), 'built': len(built)}
+
+
+def _box_of_side(n):
+    """盘面边长对应的宫格边长（不构建 Geometry），边长不支持时抛出 ValueError"""
+    for box in sudoku_solver.BOX_SIZES:
+        if n == box * box:
+            return box
+    raise ValueError(f'不支持的盘面大小: {n}×{n}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预先生成求解器下标表的快照')
+    parser.add_argument('path', help='快照文件路径（与 SOLVER_TABLES_PATH 相同）')
+    parser.add_argument('--sides', nargs='+', type=int, default=list(BOARD_SIDES), help='盘面边长（默认 4 9 16 25）')
+    args = parser.parse_args(argv)
+    save_snapshot(args.path, [_box_of_side(n) for n in args.sides])
+    print(f'已写入 {args.path}（{os.path.getsize(args.path)} 字节）', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+启动耗时报告
+
+服务入口在加载时按阶段记录耗时（导入依赖、创建应用、求解器下标表、启动进程池等），
+完成时向标准错误输出一行摘要；总耗时超过 STARTUP_BUDGET_MS（毫秒，默认 1000）时标记为超出预算。
+设置 STARTUP_REPORT=0 可以关闭输出，各阶段耗时同时以 sudoku_startup_phase_seconds 暴露在 /metrics 中。
+
+命令行在新的解释器中逐个导入入口模块，用于在发布前检查冷启动是否在预算内
+（包含解释器自身的启动时间，不包含 ASGI 入口在 lifespan 中启动进程池的时间）::
+
+    python startup.py app web_app asgi_app --budget-ms 800    # 任一入口超出预算时退出码为1
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+DEFAULT_BUDGET_MS = 1000
+
+
+class StartupReport:
+    """按阶段记录启动耗时，mark 记录从上一阶段结束到现在的时间"""
+
+    def __init__(self, name, budget_ms=None):
+        self.name = name
+        if budget_ms is None:
+            budget_ms = float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+        self.budget_ms = budget_ms
+        self.phases = {}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    @property
+    def total_ms(self):
+        return sum(self.phases.values())
+
+    @property
+    def over_budget(self):
+        return self.total_ms > self.budget_ms
+
+    def finish(self):
+        """输出摘要（STARTUP_REPORT=0 时不输出），返回 as_dict()"""
+        if os.environ.get('STARTUP_REPORT', '1') != '0':
+            print(self.summary(), file=sys.stderr, flush=True)
+        return self.as_dict()
+
+    def summary(self):
+        phases = '，'.join(f'{phase} {ms:.1f} ms' for phase, ms in self.phases.items())
+        marker = '，超出预算' if self.over_budget else ''
+        return f'{self.name} 启动用时 {self.total_ms:.1f} ms（预算 {self.budget_ms:.0f} ms{marker}）：{phases}'
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'total_ms': round(self.total_ms, 3),
+            'budget_ms': self.budget_ms,
+            'over_budget': self.over_budget,
+            'phases': {phase: round(ms, 3) for phase, ms in self.phases.items()},
+        }
+
+    def phase_seconds(self):
+        """供 /metrics 使用：{(阶段,): 秒}"""
+        return {(phase,): ms / 1000 for phase, ms in self.phases.items()}
+
+
+# 在子进程中导入入口模块并以 JSON 输出其启动报告
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+import_ms = (time.perf_counter() - start) * 1000
+report = module.startup.as_dict() if hasattr(module, 'startup') else {}
+print(json.dumps(dict(report, import_ms=import_ms)))
+'''
+
+
+def measure(module, budget_ms=None):
+    """在新的解释器中导入 module，返回其启动报告，另含 import_ms 和包含解释器启动的 process_ms"""
+    env = dict(os.environ, STARTUP_REPORT='0')
+    if budget_ms is not None:
+        env['STARTUP_BUDGET_MS'] = str(budget_ms)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', _PROBE, module], env=env, check=True,
+                            stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    process_ms = (time.perf_counter() - start) * 1000
+    return dict(json.loads(output.decode().strip().splitlines()[-1]), process_ms=process_ms)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='检查服务入口的冷启动耗时')
+    parser.add_argument('modules', nargs='*', default=['app', 'web_app', 'asgi_app'], help='入口模块（默认全部）')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help=f'冷启动预算（毫秒，含解释器启动），默认取 STARTUP_BUDGET_MS 或 {DEFAULT_BUDGET_MS}')
+    parser.add_argument('--repeat', type=int, default=3, help='每个入口测量的次数，取最小值（默认3）')
+    args = parser.parse_args(argv)
+    budget_ms = args.budget_ms
+    if budget_ms is None:
+        budget_ms = float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+
+    status = 0
+    for module in args.modules:
+        report = min((measure(module, budget_ms) for _ in range(max(1, args.repeat))),
+                     key=lambda r: r['process_ms'])
+        over = report['process_ms'] > budget_ms
+        phases = '，'.join(f'{phase} {ms:.1f} ms' for phase, ms in report.get('phases', {}).items())
+        print(f"{module:<10} 进程 {report['process_ms']:7.1f} ms  导入 {report['import_ms']:7.1f} ms"
+              f"{'  超出预算' if over else ''}  {phases}")
+        if over:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Streamlit 应用共用的数独网格显示、输入和求解
+
+Streamlit 每次交互都会从头重新运行脚本，这里的函数都尽量让重复运行几乎不做事：
+- 求解结果用 st.cache_data 按题目缓存（所有会话共用），同一题目只求解一次
+- 网格 HTML 按盘面缓存，用预先算好的格子样式一次 join 生成
+- 输入网格是一个 st.data_editor 组件，而不是 81 个 number_input
+"""
+from functools import lru_cache
+
+import pandas as pd
+import streamlit as st
+
+from sudoku_solver import SolveStats, SolveTimeout, SudokuSolver, budget_from_env
+
+# 求解预算，通过环境变量 SOLVE_TIME_LIMIT / SOLVE_MAX_NODES 配置
+solve_budget = budget_from_env()
+
+_CELL_BASE = "border: 1px solid #999; width: 40px; height: 40px; text-align: center; vertical-align: middle;"
+_GIVEN = " background-color: #e0e0e0;"  # 原始数字背景色
+_FONT = " font-weight: bold; font-size: 20px;"
+
+
+def _cell_style(i, j):
+    style = _CELL_BASE
+    # 添加粗边框分隔3x3宫格
+    if i % 3 == 0 and i != 0:
+        style += " border-top: 3px solid #000;"
+    if j % 3 == 0 and j != 0:
+        style += " border-left: 3px solid #000;"
+    if i == 8:
+        style += " border-bottom: 3px solid #000;"
+    if j == 8:
+        style += " border-right: 3px solid #000;"
+    return style
+
+
+# 每个格子有数字/空格两种 <td> 开头，模块加载时算好
+_TD_EMPTY = [[f"<td style='{_cell_style(i, j)}{_FONT}'>" for j in range(9)] for i in range(9)]
+_TD_GIVEN = [[f"<td style='{_cell_style(i, j)}{_GIVEN}{_FONT}'>" for j in range(9)] for i in range(9)]
+
+
+def board_key(board):
+    """9x9 列表 -> 81 字符字符串，用作缓存键"""
+    return ''.join(str(v) for row in board for v in row)
+
+
+@lru_cache(maxsize=1024)
+def _grid_html(key):
+    parts = ["<table style='border-collapse: collapse; margin: 10px auto;'>"]
+    for i in range(9):
+        parts.append("<tr>")
+        for j in range(9):
+            ch = key[i * 9 + j]
+            if ch == '0':
+                parts.append(_TD_EMPTY[i][j] + "</td>")
+            else:
+                parts.append(_TD_GIVEN[i][j] + ch + "</td>")
+        parts.append("</tr>")
+    parts.append("</table>")
+    return ''.join(parts)
+
+
+def grid_html(board):
+    """数独网格的 HTML 表格（按盘面缓存）"""
+    return _grid_html(board_key(board))
+
+
+def display_sudoku_grid(grid_data, title):
+    """显示数独网格"""
+    st.subheader(title)
+    st.markdown(grid_html(grid_data), unsafe_allow_html=True)
+
+
+@st.cache_data(max_entries=4096, show_spinner=False)
+def _solve(key):
+    board = [[int(ch) for ch in key[r * 9:r * 9 + 9]] for r in range(9)]
+    stats = SolveStats()
+    try:
+        solution = SudokuSolver.solve(board, stats=stats, **solve_budget)
+    except SolveTimeout as e:
+        return {'status': 'timeout', 'solution': None, 'message': str(e), 'stats': stats.summary()}
+    return {'status': 'solved' if solution is not None else 'no_solution',
+            'solution': solution, 'message': '', 'stats': stats.summary()}
+
+
+def solve_puzzle(board):
+    """
+    求解 9x9 题目，结果按题目缓存（超时的结果也会缓存，预算不变时重试没有意义）。
+    返回 {'status': solved/no_solution/timeout, 'solution': 9x9 列表或 None, 'message', 'stats': 统计摘要}，
+    命中缓存时 stats 是第一次求解时的统计。st.cache_data 每次返回副本，调用方可以修改结果
+    """
+    return _solve(board_key(board))
+
+
+def grid_editor(board, key):
+    """
+    可编辑的 9x9 网格（单个 st.data_editor 组件），返回编辑后的 9x9 列表，空格为 0。
+    board 只作为初始内容；需要用新的题目替换网格内容时换一个 key
+    """
+    columns = [str(j + 1) for j in range(9)]
+    frame = pd.DataFrame(board, columns=columns, index=columns)
+    edited = st.data_editor(
+        frame,
+        key=key,
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(c, min_value=0, max_value=9, step=1, format='%d')
+                       for c in columns},
+    )
+    return edited.fillna(0).astype(int).clip(0, 9).values.tolist()
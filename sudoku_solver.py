@@ -0,0 +1,681 @@
+"""
+数独求解引擎
+
+所有 Web / Streamlit 应用共用的求解器实现，支持 4×4、9×9、16×16 和 25×25 盘面（宫格边长 2-5）。
+盘面在内部是扁平的字节数组，每行、每列、每个宫格各维护一个已用数字的位掩码（Python 整数，25 位也足够），
+放置和撤销数字时增量更新。搜索前先做裸单（naked single）和隐单（hidden single）传播，
+分支时优先选择候选数最少的格子（MRV）。搜索是迭代的，用显式的撤销栈代替递归；
+与嵌套列表格式之间的转换只在 API 边界进行。
+可以为每次求解设置时间和节点预算，搜索过程中协作式检查，超出时抛出 SolveTimeout。
+"""
+import os
+import time
+
+# 支持的宫格边长：2（4×4）到 5（25×25），标准数独为 3
+BOX_SIZES = (2, 3, 4, 5)
+# 对应的盘面边长
+BOARD_SIDES = tuple(box * box for box in BOX_SIZES)
+
+
+class _PopCount:
+    """位数较多时代替查找表的 popcount（25 位的完整表太大）"""
+
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+class _DigitOfBit:
+    """位数较多时代替查找表：只有一位为1的掩码对应的数字，其他为0"""
+
+    def __getitem__(self, mask):
+        return mask.bit_length() if mask and not mask & (mask - 1) else 0
+
+
+class Geometry:
+    """
+    N×N 盘面（N = box²）的下标表，每种尺寸只构建一次。
+    盘面在内部是 N² 字节的扁平数组，格子下标 idx = 行 * N + 列；
+    数字 d 对应的位为 1 << (d - 1)，N 个数字全部可用时为 full_mask
+    """
+
+    def __init__(self, box):
+        n = box * box
+        size = n * n
+        self.box = box
+        self.n = n
+        self.size = size
+        self.full_mask = (1 << n) - 1
+        self.row_of = bytes(i // n for i in range(size))
+        self.col_of = bytes(i % n for i in range(size))
+        self.box_of = bytes((i // (n * box)) * box + (i % n) // box for i in range(size))
+
+        # 3N 个单元（N 行、N 列、N 宫），每个单元是 N 个格子下标
+        self.units = (
+            [[r * n + c for c in range(n)] for r in range(n)]
+            + [[r * n + c for r in range(n)] for c in range(n)]
+            + [[(b // box) * n * box + (b % box) * box + (k // box) * n + k % box for k in range(n)]
+               for b in range(n)]
+        )
+        # 下标不超过 255 时用 bytes 存储，遍历更快
+        pack = bytes if size <= 256 else tuple
+        self.unit_cells = tuple(pack(unit) for unit in self.units)
+        unit_sets = [set(unit) for unit in self.units]
+        self.peers = tuple(
+            pack(sorted({j for unit in unit_sets if i in unit for j in unit} - {i}))
+            for i in range(size)
+        )
+
+        if n <= 16:
+            # 逐位翻倍构建：低 k 位的表加上最高位为 1 的一半，比逐个 bin().count() 快得多
+            self.bit_count = [0]
+            for _ in range(n):
+                self.bit_count += [c + 1 for c in self.bit_count]
+            self.digit_of_bit = [0] * (self.full_mask + 1)
+            for d in range(1, n + 1):
+                self.digit_of_bit[1 << (d - 1)] = d
+        else:
+            self.bit_count = _PopCount()
+            self.digit_of_bit = _DigitOfBit()
+
+
+_GEOMETRIES = {}
+
+
+def geometry(box=3):
+    """边长为 box 的宫格对应的 Geometry（按需构建并缓存）"""
+    if box not in _GEOMETRIES:
+        if box not in BOX_SIZES:
+            raise ValueError(f'不支持的宫格大小: {box}')
+        _GEOMETRIES[box] = Geometry(box)
+    return _GEOMETRIES[box]
+
+
+def geometry_for_side(n):
+    """按盘面边长（4、9、16、25）返回 Geometry"""
+    for box in BOX_SIZES:
+        if n == box * box:
+            return geometry(box)
+    raise ValueError(f'不支持的盘面大小: {n}×{n}')
+
+
+def geometry_for_cells(size):
+    """按扁平盘面的格子数（16、81、256、625）返回 Geometry"""
+    for box in BOX_SIZES:
+        if size == box ** 4:
+            return geometry(box)
+    raise ValueError(f'不支持的盘面格子数: {size}')
+
+
+# 标准 9×9 盘面的表，供只处理标准数独的模块直接使用
+STANDARD = geometry(3)
+FULL_MASK = STANDARD.full_mask
+ROW_OF = STANDARD.row_of
+COL_OF = STANDARD.col_of
+BOX_OF = STANDARD.box_of
+UNITS = STANDARD.units
+UNIT_CELLS = STANDARD.unit_cells
+PEERS = STANDARD.peers
+BIT_COUNT = STANDARD.bit_count
+DIGIT_OF_BIT = STANDARD.digit_of_bit
+
+
+def board_to_cells(board):
+    """
+    把 N×N 嵌套列表（N 为 4、9、16 或 25）转换为 N² 字节的扁平盘面（只在 API 边界调用）。
+    尺寸不支持或数字超出 1..N 时抛出 ValueError
+    """
+    n = len(board)
+    geometry_for_side(n)
+    cells = bytearray(n * n)
+    for r in range(n):
+        row = board[r]
+        if len(row) != n:
+            raise ValueError('盘面不是正方形')
+        base = r * n
+        for c in range(n):
+            value = row[c]
+            if value:
+                if not 0 < value <= n:
+                    raise ValueError(f'无效的数字: {value}')
+                cells[base + c] = value
+    return cells
+
+
+def cells_to_board(cells):
+    """把 N² 字节的扁平盘面转换回 N×N 嵌套列表"""
+    n = geometry_for_cells(len(cells)).n
+    return [list(cells[r * n:r * n + n]) for r in range(n)]
+
+
+def find_conflicts(cells):
+    """
+    搜索前的快速检查，只看已给数字，时间与格子数成正比。发现矛盾时返回 (原因, 格子下标列表)，否则返回 None：
+    - 'duplicate'：同一行/列/宫中重复的已给数字（列出所有重复的格子）
+    - 'no_candidates'：已给数字排除后没有任何候选数的空格
+    - 'forced_clash'：同一单元中有两个空格都只剩同一个候选数
+
+    不做完整的约束传播：完整传播的开销和解一道简单题相当，其余矛盾由搜索在根节点的传播中立即发现
+    """
+    g = geometry_for_cells(len(cells))
+    n, full = g.n, g.full_mask
+    row_of, col_of, box_of = g.row_of, g.col_of, g.box_of
+    rows, cols, boxes = [0] * n, [0] * n, [0] * n
+    duplicate = False
+    for idx in range(g.size):
+        value = cells[idx]
+        if value:
+            bit = 1 << (value - 1)
+            r, c, b = row_of[idx], col_of[idx], box_of[idx]
+            if (rows[r] | cols[c] | boxes[b]) & bit:
+                duplicate = True
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+    if duplicate:
+        return 'duplicate', _clashing_cells(g, cells)
+
+    # 只剩一个候选数的空格按单元记录其数字位，同一单元中再次出现同一位即为冲突
+    forced_rows, forced_cols, forced_boxes = [0] * n, [0] * n, [0] * n
+    dead = []
+    clash = False
+    for idx in range(g.size):
+        if cells[idx]:
+            continue
+        r, c, b = row_of[idx], col_of[idx], box_of[idx]
+        cand = full & ~(rows[r] | cols[c] | boxes[b])
+        if not cand:
+            dead.append(idx)
+        elif not cand & (cand - 1):
+            if (forced_rows[r] | forced_cols[c] | forced_boxes[b]) & cand:
+                clash = True
+            forced_rows[r] |= cand
+            forced_cols[c] |= cand
+            forced_boxes[b] |= cand
+    if dead:
+        return 'no_candidates', dead
+    if clash:
+        forced = bytearray(g.size)
+        for idx in range(g.size):
+            if not cells[idx]:
+                cand = full & ~(rows[row_of[idx]] | cols[col_of[idx]] | boxes[box_of[idx]])
+                if not cand & (cand - 1):
+                    forced[idx] = cand.bit_length()
+        return 'forced_clash', _clashing_cells(g, forced)
+    return None
+
+
+def _clashing_cells(g, cells):
+    """cells 中同一单元内数字相同的所有格子（只在已确定有冲突时调用）"""
+    clashing = set()
+    for unit in g.units:
+        seen = {}
+        for idx in unit:
+            value = cells[idx]
+            if value:
+                other = seen.setdefault(value, idx)
+                if other != idx:
+                    clashing.update((other, idx))
+    return sorted(clashing)
+
+
+class SolveTimeout(Exception):
+    """求解超出时间或节点预算"""
+
+    def __init__(self, nodes, elapsed):
+        super().__init__(f'求解超出预算（已访问 {nodes} 个节点，耗时 {elapsed * 1000:.1f} ms）')
+        self.nodes = nodes
+        self.elapsed = elapsed
+        # 计数搜索超时前已经找到的第一个解（bytes），由 count_solutions_cells 填入
+        self.solution = None
+
+    def stats(self):
+        return {'nodes': self.nodes, 'elapsed_ms': round(self.elapsed * 1000, 3)}
+
+
+class SearchBudget:
+    """
+    时间/节点预算。搜索每访问一个节点调用一次 tick()，
+    节点数每次都检查，时间每 16 个节点检查一次以减少开销
+    """
+
+    def __init__(self, time_limit=None, max_nodes=None):
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.started = time.perf_counter()
+        self.deadline = self.started + time_limit if time_limit else None
+
+    def tick(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            self.expire()
+        if self.deadline is not None and not self.nodes & 0xF and time.perf_counter() > self.deadline:
+            self.expire()
+
+    def expire(self):
+        raise SolveTimeout(self.nodes, time.perf_counter() - self.started)
+
+
+class SolveStats:
+    """
+    可选的求解统计：访问节点数、回溯次数（传播遇到矛盾的次数）、最大搜索深度、
+    猜测次数、传播填入的格子数、墙钟时间和 CPU 时间。
+    把实例通过 stats 参数传给求解函数即可收集；不传时使用不做统计的搜索引擎，没有额外开销。
+    多次求解使用同一个实例时数值累加
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.guesses = 0
+        self.propagations = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.cached = False
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'guesses': self.guesses,
+            'propagations': self.propagations,
+            'elapsed_ms': round(self.wall_time * 1000, 3),
+            'cpu_ms': round(self.cpu_time * 1000, 3),
+            'cached': self.cached,
+        }
+
+    def summary(self):
+        """一行中文摘要，用于界面显示"""
+        if self.cached:
+            return '命中解缓存，未进行搜索'
+        return (f'访问 {self.nodes} 个节点，回溯 {self.backtracks} 次，最大深度 {self.max_depth}，'
+                f'猜测 {self.guesses} 次，传播填入 {self.propagations} 格，'
+                f'耗时 {self.wall_time * 1000:.1f} ms（CPU {self.cpu_time * 1000:.1f} ms）')
+
+
+def budget_from_env():
+    """
+    从环境变量读取默认求解预算：SOLVE_TIME_LIMIT（秒，默认10，设为0表示不限制）
+    和 SOLVE_MAX_NODES（默认不限制）
+    """
+    time_limit = float(os.environ.get('SOLVE_TIME_LIMIT', 10))
+    max_nodes = os.environ.get('SOLVE_MAX_NODES')
+    return {
+        'time_limit': time_limit or None,
+        'max_nodes': int(max_nodes) if max_nodes else None,
+    }
+
+
+class _BitmaskSearch:
+    """
+    基于位掩码的约束传播 + 迭代回溯搜索。
+    放置过的格子记录在预分配的 trail 中，回溯时按 trail 撤销；
+    搜索栈是预分配的并行数组，既不递归，也不在搜索过程中复制盘面。
+    各种尺寸共用同一套代码，下标表和候选位数都来自 geometry
+    """
+
+    def __init__(self, budget=None, geometry=STANDARD):
+        size, n = geometry.size, geometry.n
+        self.geometry = geometry
+        self.full_mask = geometry.full_mask
+        self.row_of = geometry.row_of
+        self.col_of = geometry.col_of
+        self.box_of = geometry.box_of
+        self.cells = bytearray(size)
+        self.rows = [0] * n
+        self.cols = [0] * n
+        self.boxes = [0] * n
+        self.trail = [0] * size
+        self.tlen = 0
+        self.budget = budget or SearchBudget()
+        # 搜索栈每层：trail 位置、分支格子（-1 表示按单元内数字的位置分支）、单元、数字位、剩余选项掩码
+        self.st_mark = [0] * (size + 1)
+        self.st_cell = [0] * (size + 1)
+        self.st_unit = [0] * (size + 1)
+        self.st_bit = [0] * (size + 1)
+        self.st_rest = [0] * (size + 1)
+        self.solution = None
+
+    def load(self, cells):
+        """载入扁平盘面，已给数字互相冲突时返回 False"""
+        n = self.geometry.n
+        for idx in range(self.geometry.size):
+            value = cells[idx]
+            if value:
+                if value > n:
+                    raise ValueError(f'无效的数字: {value}')
+                if not self.place(idx, value):
+                    return False
+        return True
+
+    def candidates(self, idx):
+        return self.full_mask & ~(self.rows[self.row_of[idx]] | self.cols[self.col_of[idx]]
+                                  | self.boxes[self.box_of[idx]])
+
+    def place(self, idx, digit):
+        bit = 1 << (digit - 1)
+        r, c, b = self.row_of[idx], self.col_of[idx], self.box_of[idx]
+        if (self.rows[r] | self.cols[c] | self.boxes[b]) & bit:
+            return False
+        self.rows[r] |= bit
+        self.cols[c] |= bit
+        self.boxes[b] |= bit
+        self.cells[idx] = digit
+        self.trail[self.tlen] = idx
+        self.tlen += 1
+        return True
+
+    def undo(self, mark):
+        """撤销 trail 中 mark 之后的所有放置"""
+        cells, trail = self.cells, self.trail
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        while self.tlen > mark:
+            self.tlen -= 1
+            idx = trail[self.tlen]
+            mask = ~(1 << (cells[idx] - 1))
+            rows[row_of[idx]] &= mask
+            cols[col_of[idx]] &= mask
+            boxes[box_of[idx]] &= mask
+            cells[idx] = 0
+
+    def propagate(self, start):
+        """
+        从 trail[start] 起，检查每个新放置格子的同行/列/宫格子做裸单传播，
+        再对所有单元做隐单传播，直到不再有新放置；出现矛盾时返回 False
+        """
+        cells, rows, cols, boxes, trail = self.cells, self.rows, self.cols, self.boxes, self.trail
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        full = self.full_mask
+        peers, unit_cells, digit_of_bit = self.geometry.peers, self.geometry.unit_cells, self.geometry.digit_of_bit
+        p = start
+        while True:
+            # 裸单：只有新放置格子的同行/列/宫格子候选数会变化
+            while p < self.tlen:
+                for idx in peers[trail[p]]:
+                    if cells[idx]:
+                        continue
+                    cand = full & ~(rows[row_of[idx]] | cols[col_of[idx]] | boxes[box_of[idx]])
+                    if not cand:
+                        return False
+                    if not cand & (cand - 1):
+                        self.place(idx, digit_of_bit[cand])
+                p += 1
+
+            # 隐单：某数字在单元内只有一个位置可放
+            placed_any = False
+            for unit in unit_cells:
+                once = twice = placed = 0
+                for idx in unit:
+                    if cells[idx]:
+                        placed |= 1 << (cells[idx] - 1)
+                        continue
+                    cand = full & ~(rows[row_of[idx]] | cols[col_of[idx]] | boxes[box_of[idx]])
+                    twice |= once & cand
+                    once |= cand
+                if (once | placed) != full:
+                    return False
+                singles = once & ~twice
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    for idx in unit:
+                        if not cells[idx] and self.candidates(idx) & bit:
+                            self.place(idx, digit_of_bit[bit])
+                            placed_any = True
+                            break
+                    else:
+                        return False
+            if not placed_any:
+                return True
+
+    def choose(self, depth):
+        """
+        选择分支点写入搜索栈第 depth 层：候选数最少的格子；
+        若该格子候选数超过2，而某单元内有只剩两个位置的数字，则改为按该数字的位置分支。
+        盘面已填满时返回 False
+        """
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        full = self.full_mask
+        bit_count = self.geometry.bit_count
+        best = -1
+        best_count = self.geometry.n + 1
+        best_cand = 0
+        for idx in range(self.geometry.size):
+            if cells[idx]:
+                continue
+            cand = full & ~(rows[row_of[idx]] | cols[col_of[idx]] | boxes[box_of[idx]])
+            count = bit_count[cand]
+            if count < best_count:
+                best, best_count, best_cand = idx, count, cand
+                if count == 2:
+                    break
+        if best < 0:
+            return False
+
+        self.st_mark[depth] = self.tlen
+        self.st_cell[depth] = best
+        self.st_rest[depth] = best_cand
+        if best_count > 2:
+            for u, unit in enumerate(self.geometry.unit_cells):
+                once = twice = thrice = 0
+                for idx in unit:
+                    if not cells[idx]:
+                        cand = full & ~(rows[row_of[idx]] | cols[col_of[idx]] | boxes[box_of[idx]])
+                        thrice |= twice & cand
+                        twice |= once & cand
+                        once |= cand
+                pairs = twice & ~thrice
+                if pairs:
+                    bit = pairs & -pairs
+                    rest = 0
+                    for k, idx in enumerate(unit):
+                        if not cells[idx] and self.candidates(idx) & bit:
+                            rest |= 1 << k
+                    self.st_cell[depth] = -1
+                    self.st_unit[depth] = u
+                    self.st_bit[depth] = bit
+                    self.st_rest[depth] = rest
+                    break
+        return True
+
+    def advance(self, depth):
+        """在第 depth 层放置下一个选项，没有剩余选项时返回 False"""
+        rest = self.st_rest[depth]
+        if not rest:
+            return False
+        low = rest & -rest
+        self.st_rest[depth] = rest ^ low
+        cell = self.st_cell[depth]
+        if cell >= 0:
+            self.place(cell, self.geometry.digit_of_bit[low])
+        else:
+            unit = self.geometry.unit_cells[self.st_unit[depth]]
+            self.place(unit[low.bit_length() - 1], self.geometry.digit_of_bit[self.st_bit[depth]])
+        return True
+
+    def run(self, limit=1):
+        """
+        迭代回溯搜索，找到 limit 个解或搜索完整棵树后返回找到的解的个数。
+        第一个解保存在 self.solution 中
+        """
+        budget = self.budget
+        found = 0
+        depth = 0
+        start = 0
+        try:
+            while True:
+                budget.tick()
+                if self.propagate(start):
+                    if self.choose(depth):
+                        depth += 1
+                    else:
+                        found += 1
+                        if self.solution is None:
+                            self.solution = bytes(self.cells)
+                        if found >= limit:
+                            return found
+
+                # 回溯到最近一个还有剩余选项的分支点
+                while depth:
+                    self.undo(self.st_mark[depth - 1])
+                    start = self.tlen
+                    if self.advance(depth - 1):
+                        break
+                    depth -= 1
+                else:
+                    return found
+        except SolveTimeout:
+            # 记录中断位置，供 frontier() 取出尚未搜索的子树
+            self.depth, self.found = depth, found
+            raise
+
+    def frontier(self):
+        """
+        run() 因超出预算中断后，返回尚未搜索的子树（扁平盘面 bytes 列表，均未做传播）：
+        中断时所在的节点，以及从深到浅各层分支点还没尝试的选项。
+        这些子树互不相交，和已经搜索过的部分合起来正好是整棵搜索树。调用后引擎不能再继续搜索
+        """
+        boards = [bytes(self.cells)]
+        for depth in range(self.depth - 1, -1, -1):
+            self.undo(self.st_mark[depth])
+            while self.advance(depth):
+                boards.append(bytes(self.cells))
+                self.undo(self.st_mark[depth])
+        return boards
+
+
+class _InstrumentedSearch(_BitmaskSearch):
+    """在每个搜索节点上记录 SolveStats 的搜索引擎，只在请求统计时使用"""
+
+    def __init__(self, budget, stats, geometry=STANDARD):
+        super().__init__(budget, geometry)
+        self.stats = stats
+
+    def propagate(self, start):
+        before = self.tlen
+        ok = super().propagate(start)
+        self.stats.propagations += self.tlen - before
+        if not ok:
+            self.stats.backtracks += 1
+        return ok
+
+    def choose(self, depth):
+        # 只有真正压入分支点时才算一层深度，盘面已填满时不计
+        if not super().choose(depth):
+            return False
+        if depth >= self.stats.max_depth:
+            self.stats.max_depth = depth + 1
+        return True
+
+    def advance(self, depth):
+        if super().advance(depth):
+            self.stats.guesses += 1
+            return True
+        return False
+
+    def run(self, limit=1):
+        stats = self.stats
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            return super().run(limit)
+        finally:
+            stats.nodes += self.budget.nodes
+            stats.wall_time += time.perf_counter() - wall
+            stats.cpu_time += time.process_time() - cpu
+
+
+def _engine(time_limit, max_nodes, stats, size=81):
+    """size 为扁平盘面的格子数，决定使用哪种尺寸的下标表"""
+    budget = SearchBudget(time_limit, max_nodes)
+    geometry = STANDARD if size == 81 else geometry_for_cells(size)
+    if stats is None:
+        return _BitmaskSearch(budget, geometry)
+    return _InstrumentedSearch(budget, stats, geometry)
+
+
+class SudokuSolver:
+    @staticmethod
+    def is_valid(board, row, col, num):
+        """检查在给定位置放置数字是否有效（任意支持的尺寸）"""
+        n = len(board)
+        box = geometry_for_side(n).box
+        if num in board[row]:
+            return False
+        if any(board[i][col] == num for i in range(n)):
+            return False
+        start_row = row - row % box
+        start_col = col - col % box
+        for i in range(start_row, start_row + box):
+            if num in board[i][start_col:start_col + box]:
+                return False
+        return True
+
+    @staticmethod
+    def solve_cells(cells, time_limit=None, max_nodes=None, stats=None):
+        """
+        在扁平盘面（81 字节；其他尺寸为 N² 字节）上求解，返回解（bytes），无解时返回 None。
+        time_limit（秒）/max_nodes 为搜索预算，超出时抛出 SolveTimeout；
+        stats 为 SolveStats 实例时收集搜索统计
+        """
+        engine = _engine(time_limit, max_nodes, stats, len(cells))
+        if not engine.load(cells):
+            return None
+        engine.run(1)
+        return engine.solution
+
+    @staticmethod
+    def solve(board, time_limit=None, max_nodes=None, stats=None):
+        """求解 N×N 题目（默认 9×9），返回新的解（嵌套列表），无解时返回 None；board 不会被修改"""
+        solution = SudokuSolver.solve_cells(board_to_cells(board), time_limit, max_nodes, stats)
+        return None if solution is None else cells_to_board(solution)
+
+    @staticmethod
+    def solve_sudoku(board, time_limit=None, max_nodes=None, stats=None):
+        """
+        求解数独，成功时原地填充 board 并返回 True，无解时 board 保持不变。
+        time_limit（秒）/max_nodes 为搜索预算，超出时抛出 SolveTimeout
+        """
+        solution = SudokuSolver.solve_cells(board_to_cells(board), time_limit, max_nodes, stats)
+        if solution is None:
+            return False
+        n = len(board)
+        for r in range(n):
+            board[r][:] = solution[r * n:r * n + n]
+        return True
+
+    @staticmethod
+    def count_solutions_cells(cells, limit=2, time_limit=None, max_nodes=None, stats=None):
+        """
+        统计扁平盘面的解的个数，找到 limit 个解后立即停止，返回 (解的个数, 第一个解（bytes）或 None)。
+        超出预算时抛出 SolveTimeout，其 solution 为超时前已经找到的第一个解
+        """
+        engine = _engine(time_limit, max_nodes, stats, len(cells))
+        if not engine.load(cells):
+            return 0, None
+        try:
+            return engine.run(limit), engine.solution
+        except SolveTimeout as e:
+            e.solution = engine.solution
+            raise
+
+    @staticmethod
+    def count_solutions(board, limit=2, time_limit=None, max_nodes=None, stats=None):
+        """统计解的个数，找到 limit 个解后立即停止；board 不会被修改"""
+        return SudokuSolver.count_solutions_cells(board_to_cells(board), limit, time_limit, max_nodes, stats)[0]
+
+
+# 可选的求解后端名称，'backtracking' 为默认的位掩码回溯求解器
+SOLVER_NAMES = ('backtracking', 'dlx')
+
+
+def get_solver(name='backtracking'):
+    """按名称返回求解器类，名称未知时抛出 ValueError"""
+    if name == 'backtracking':
+        return SudokuSolver
+    if name == 'dlx':
+        from dlx_solver import DLXSolver
+        return DLXSolver
+    raise ValueError(f'未知的求解器: {name}')
@@ -0,0 +1,143 @@
+"""
+数独对称规范化
+
+数独的对称群包括：转置、三个横带（band）的排列、带内三行的排列、
+三个竖栈（stack）的排列、栈内三列的排列（共 2 × 6^8 = 3,359,232 种），
+再加上数字 1-9 的重新编号。等价的题目有相同的解结构，只需求解一次。
+
+穷举整个群代价太高，这里先用与变换无关的不变量（每行/列已给数字的全盘出现次数，
+以及经过两轮细化的行列签名）对行、列、带、栈排序，只在不变量相同的并列项之间
+枚举排列（数量有上限），再按数字首次出现的顺序重新编号，取字典序最小的结果。
+并列项超过上限时按原始顺序打破并列，结果仍然正确，只是等价题目可能落到不同的键上。
+"""
+import itertools
+
+# 每个转置方向上最多尝试的行/列排列组合数
+MAX_CANDIDATES = 64
+
+
+def _transpose(cells):
+    return [cells[c * 9 + r] for r in range(9) for c in range(9)]
+
+
+def _line_keys(cells):
+    """计算行和列的不变量签名（各已给数字在全盘出现次数的多重集 + 两轮细化）"""
+    freq = [0] * 10
+    for v in cells:
+        freq[v] += 1
+    row_keys = [tuple(sorted(freq[cells[r * 9 + c]] for c in range(9) if cells[r * 9 + c])) for r in range(9)]
+    col_keys = [tuple(sorted(freq[cells[r * 9 + c]] for r in range(9) if cells[r * 9 + c])) for c in range(9)]
+    for _ in range(2):
+        row_keys, col_keys = (
+            [(row_keys[r], tuple(sorted(col_keys[c] for c in range(9) if cells[r * 9 + c])))
+             for r in range(9)],
+            [(col_keys[c], tuple(sorted(row_keys[r] for r in range(9) if cells[r * 9 + c])))
+             for c in range(9)],
+        )
+    return row_keys, col_keys
+
+
+def _tied_permutations(items, key):
+    """按 key 降序排列 items，并列项之间枚举全部排列"""
+    ordered = sorted(items, key=key, reverse=True)
+    groups = [list(g) for _, g in itertools.groupby(ordered, key=key)]
+    for combo in itertools.product(*(itertools.permutations(g) for g in groups)):
+        yield [x for group in combo for x in group]
+
+
+def _line_orders(keys, limit):
+    """
+    生成满足数独对称约束的行（或列）顺序：先排三个带，再排带内三行。
+    组合数超过 limit 时只保留按原始顺序打破并列的那一种
+    """
+    bands = [(b, tuple(sorted((keys[b * 3 + k] for k in range(3)), reverse=True))) for b in range(3)]
+
+    def build(stable):
+        if stable:
+            band_orders = [[b for b, _ in sorted(bands, key=lambda x: x[1], reverse=True)]]
+        else:
+            band_orders = list(_tied_permutations(bands, key=lambda x: x[1]))
+            band_orders = [[b for b, _ in order] for order in band_orders]
+        for band_order in band_orders:
+            inner = []
+            for b in band_order:
+                lines = [b * 3 + k for k in range(3)]
+                if stable:
+                    inner.append([sorted(lines, key=lambda i: keys[i], reverse=True)])
+                else:
+                    inner.append(list(_tied_permutations(lines, key=lambda i: keys[i])))
+            for combo in itertools.product(*inner):
+                yield [i for part in combo for i in part]
+
+    orders = list(itertools.islice(build(False), limit + 1))
+    if len(orders) > limit:
+        orders = list(build(True))
+    return orders
+
+
+def _relabel(cells, rows, cols, best=None):
+    """
+    按行列顺序读出盘面，并把数字按首次出现顺序重新编号。
+    给出当前最优结果 best 时，一旦确定结果的字典序更大就提前返回 None
+    """
+    mapping = [0] * 10
+    next_label = 1
+    out = []
+    smaller = best is None
+    for r in rows:
+        base = r * 9
+        for c in cols:
+            v = cells[base + c]
+            if v and not mapping[v]:
+                mapping[v] = next_label
+                next_label += 1
+            label = mapping[v]
+            if not smaller:
+                ref = best[len(out)]
+                if label > ref:
+                    return None
+                smaller = label < ref
+            out.append(label)
+    # 题目中未出现的数字依次分配剩余的编号，保证是完整的置换
+    for v in range(1, 10):
+        if not mapping[v]:
+            mapping[v] = next_label
+            next_label += 1
+    return out, mapping
+
+
+def canonicalize(board):
+    """
+    计算题目的规范形式。
+    返回 (canonical_board, transform)，transform 用于 apply_inverse 把规范形式下的解映射回原题
+    """
+    cells = [v for row in board for v in row]
+    best = None
+    for transposed in (False, True):
+        src = _transpose(cells) if transposed else cells
+        row_keys, col_keys = _line_keys(src)
+        row_orders = _line_orders(row_keys, MAX_CANDIDATES)
+        col_orders = _line_orders(col_keys, max(1, MAX_CANDIDATES // len(row_orders)))
+        for rows in row_orders:
+            for cols in col_orders:
+                result = _relabel(src, rows, cols, best[0] if best else None)
+                if result is not None:
+                    out, mapping = result
+                    best = (out, (transposed, rows, cols, mapping))
+    out, transform = best
+    return [out[r * 9:r * 9 + 9] for r in range(9)], transform
+
+
+def apply_inverse(transform, board):
+    """把规范形式下的盘面（通常是解）映射回原题的坐标和数字"""
+    transposed, rows, cols, mapping = transform
+    inverse = [0] * 10
+    for v in range(1, 10):
+        inverse[mapping[v]] = v
+    cells = [0] * 81
+    for i, r in enumerate(rows):
+        for j, c in enumerate(cols):
+            cells[r * 9 + c] = inverse[board[i][j]]
+    if transposed:
+        cells = _transpose(cells)
+    return [cells[r * 9:r * 9 + 9] for r in range(9)]
@@ -0,0 +1,63 @@
+"""
+上传图片的可选持久化存储
+
+文件以内容的 SHA-256 命名，相同图片只保存一份，并发上传同名文件也不会互相覆盖；
+扩展名按文件头识别的图片格式确定，不使用客户端提供的文件名。
+目录总大小超过上限时，按修改时间从旧到新删除文件。
+"""
+import hashlib
+import os
+import threading
+
+# 文件头 -> 保存时使用的扩展名，其他格式保存时不带扩展名
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+)
+
+
+def image_extension(data):
+    """按文件头返回图片的扩展名（.jpg 或 .png），无法识别时返回空字符串"""
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    return ''
+
+
+class UploadStore:
+    def __init__(self, folder, max_bytes=256 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def save(self, data):
+        """保存图片字节，返回保存后的文件路径"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.folder, digest + image_extension(data))
+        with self._lock:
+            if os.path.exists(path):
+                # 已存在的相同内容只更新时间，使其最后被淘汰
+                os.utime(path)
+                return path
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._evict()
+        return path
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
@@ -1,48 +1,74 @@
-from flask import Flask, render_template, request, jsonify
-import copy
+import json
 import os
+import time
+
+from startup import StartupReport
+
+# 启动耗时从这里开始计算，包括下面各依赖的导入
+startup = StartupReport('web_app')
+
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_solver import iter_solve, read_ndjson
+from metrics import CONTENT_TYPE, ServiceMetrics, pool_queue_depth
+from parallel_solver import ParallelSolver
+from solution_cache import SolutionCache
+from puzzle_generator import CHUNK_SIZES, generate_puzzles
+from solve_service import generate_response, parse_generate_request, solve_request, validate_solve_request
+from solver_tables import precompute_tables, tables_from_env
+from sudoku_solver import SOLVER_NAMES, budget_from_env
+
+startup.mark('imports')
 
 # 创建Flask应用实例
 app = Flask(__name__, template_folder='templates')
+# 批量求解使用的进程数，默认为CPU核数
+app.config['SOLVE_WORKERS'] = int(os.environ.get('SOLVE_WORKERS', os.cpu_count() or 1))
+# 解缓存容量，以及可选的 sqlite 后备文件路径
+app.config['SOLUTION_CACHE_SIZE'] = int(os.environ.get('SOLUTION_CACHE_SIZE', 4096))
+app.config['SOLUTION_CACHE_PATH'] = os.environ.get('SOLUTION_CACHE_PATH')
+
+# 单次求解的时间（秒）和节点预算，超出时返回 status: "timeout"
+app.config['SOLVE_TIME_LIMIT'] = budget_from_env()['time_limit']
+app.config['SOLVE_MAX_NODES'] = budget_from_env()['max_nodes']
+# 是否默认在响应中返回求解统计（请求中的 "stats": true 也可以单独开启）
+app.config['SOLVE_STATS'] = os.environ.get('SOLVE_STATS') == '1'
+# 是否默认用并行搜索求解 /solve（请求中的 "parallel": true/false 可以单独指定），子树在批量求解进程池中搜索
+app.config['SOLVE_PARALLEL'] = os.environ.get('SOLVE_PARALLEL') == '1'
+# /generate 单次最多生成的题目数（各难度另有 puzzle_generator.MAX_COUNTS 的上限）和时间预算（秒，0 表示不限制）
+app.config['GENERATE_MAX_COUNT'] = int(os.environ.get('GENERATE_MAX_COUNT', 1000))
+app.config['GENERATE_TIME_LIMIT'] = float(os.environ.get('GENERATE_TIME_LIMIT', 10)) or None
+
+solution_cache = SolutionCache(app.config['SOLUTION_CACHE_SIZE'], app.config['SOLUTION_CACHE_PATH'])
+
+_executor = None
+
+# /metrics 暴露的运行指标（进程内统计，抓取时才合并）
+metrics = ServiceMetrics(solution_cache.stats)
+metrics.gauge('sudoku_pool_queue_depth', 'Batch tasks submitted to the worker pool and not yet finished',
+              lambda: pool_queue_depth(_executor))
+startup.mark('app')
+
+# 预先构建各尺寸的求解器下标表（设置 SOLVER_TABLES_PATH 时从快照载入）
+precompute_tables(**tables_from_env())
+startup.mark('solver_tables')
+metrics.startup_report(startup)
+startup.finish()
+
+
+def solve_budget():
+    """当前配置的求解预算，作为关键字参数传给求解器"""
+    return {'time_limit': app.config['SOLVE_TIME_LIMIT'], 'max_nodes': app.config['SOLVE_MAX_NODES']}
+
+
+def get_executor():
+    """首次使用时创建批量求解进程池"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=app.config['SOLVE_WORKERS'])
+    return _executor
 
-class SudokuSolver:
-    @staticmethod
-    def is_valid(board, row, col, num):
-        """检查在给定位置放置数字是否有效"""
-        # 检查行
-        for i in range(9):
-            if board[row][i] == num:
-                return False
-        
-        # 检查列
-        for i in range(9):
-            if board[i][col] == num:
-                return False
-        
-        # 检查3x3子网格
-        start_row = row - row % 3
-        start_col = col - col % 3
-        for i in range(3):
-            for j in range(3):
-                if board[i + start_row][j + start_col] == num:
-                    return False
-        
-        return True
-
-    @staticmethod
-    def solve_sudoku(board):
-        """使用回溯算法解决数独"""
-        for i in range(9):
-            for j in range(9):
-                if board[i][j] == 0:
-                    for num in range(1, 10):
-                        if SudokuSolver.is_valid(board, i, j, num):
-                            board[i][j] = num
-                            if SudokuSolver.solve_sudoku(board):
-                                return True
-                            board[i][j] = 0
-                    return False
-        return True
 
 @app.route('/')
 def index():
@@ -57,28 +83,96 @@ def test():
 
 @app.route('/solve', methods=['POST'])
 def solve():
+    start = time.perf_counter()
     try:
         data = request.get_json()
-        if not data or 'puzzle' not in data:
-            return jsonify({'error': 'Invalid request data'}), 400
-            
-        puzzle = data['puzzle']
-        
-        # 验证输入数据
-        if not isinstance(puzzle, list) or len(puzzle) != 9:
-            return jsonify({'error': 'Invalid puzzle format'}), 400
-            
-        # 复制数独题目以保留原始题目
-        solution = copy.deepcopy(puzzle)
-        
-        # 求解数独
-        solver = SudokuSolver()
-        if solver.solve_sudoku(solution):
-            return jsonify({'solution': solution, 'status': 'solved'})
+        error = validate_solve_request(data)
+        if error:
+            response, code, status = {'error': error}, 400, 'invalid'
         else:
-            return jsonify({'solution': [], 'status': 'no_solution'})
+            parallel = None
+            if data.get('parallel', app.config['SOLVE_PARALLEL']):
+                parallel = ParallelSolver(get_executor(), app.config['SOLVE_WORKERS'])
+            response = solve_request(data, solution_cache, solve_budget(), app.config['SOLVE_STATS'], parallel)
+            code, status = 200, response['status']
+            metrics.solve_seconds.observe(time.perf_counter() - start, data.get('solver', 'backtracking'))
     except Exception as e:
-        return jsonify({'error': f'Error solving puzzle: {str(e)}'}), 500
+        response, code, status = {'error': f'Error solving puzzle: {str(e)}'}, 500, 'error'
+    metrics.observe_request('/solve', status, time.perf_counter() - start)
+    return jsonify(response), code
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(solution_cache.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 文本格式的运行指标"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+@app.route('/generate')
+def generate_endpoint():
+    """
+    生成唯一解的题目：/generate?difficulty=hard&count=100。
+    difficulty 为 easy/medium/hard/expert；每个题目都是新生成的（对称变换派生只在命令行工具中提供）
+    """
+    start = time.perf_counter()
+    error, params = parse_generate_request(request.args, app.config['GENERATE_MAX_COUNT'])
+    if error:
+        metrics.observe_request('/generate', 'invalid', time.perf_counter() - start)
+        return jsonify({'error': error}), 400
+    # 一个题目不值得提交到进程池
+    executor = get_executor() if params['count'] > 1 else None
+    try:
+        puzzles = generate_puzzles(params['difficulty'], params['count'], params['seed'], executor,
+                                   chunk_size=CHUNK_SIZES[params['difficulty']],
+                                   time_limit=app.config['GENERATE_TIME_LIMIT'])
+    except RuntimeError as e:
+        metrics.observe_request('/generate', 'failed', time.perf_counter() - start)
+        return jsonify({'error': f'Puzzle generation failed: {str(e)}'}), 503
+    metrics.observe_request('/generate', 'generated', time.perf_counter() - start)
+    return jsonify(generate_response(params['difficulty'], puzzles))
+
+@app.route('/solve/batch', methods=['POST'])
+def solve_batch():
+    """
+    批量求解。请求体可以是 {"puzzles": [...], "solver": "..."}，
+    也可以是 application/x-ndjson 格式的逐行题目（求解器通过 ?solver= 指定）。
+    结果以 NDJSON 按输入顺序流式返回，每行包含 index、status 和 time_ms；
+    "stats": true（或 ?stats=1）时每行附带求解统计，可用于按难度排序题目。
+    """
+    start = time.perf_counter()
+    if request.mimetype == 'application/x-ndjson':
+        puzzles = read_ndjson(request.stream)
+        solver_name = request.args.get('solver', 'backtracking')
+        with_stats = request.args.get('stats', '1' if app.config['SOLVE_STATS'] else '0') == '1'
+    else:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('puzzles'), list):
+            metrics.observe_request('/solve/batch', 'invalid', time.perf_counter() - start)
+            return jsonify({'error': 'Invalid request data'}), 400
+        puzzles = data['puzzles']
+        solver_name = data.get('solver', 'backtracking')
+        with_stats = bool(data.get('stats', app.config['SOLVE_STATS']))
+
+    if solver_name not in SOLVER_NAMES:
+        metrics.observe_request('/solve/batch', 'invalid', time.perf_counter() - start)
+        return jsonify({'error': f'Unknown solver: {solver_name}'}), 400
+
+    def generate():
+        status = 'error'
+        try:
+            for index, result in iter_solve(puzzles, get_executor(), solver_name, with_stats=with_stats,
+                                            **solve_budget()):
+                metrics.observe_batch_result(result, solver_name)
+                result['index'] = index
+                yield json.dumps(result) + '\n'
+            status = 'completed'
+        finally:
+            # 流式响应结束（或客户端断开）时才记录整个批量请求
+            metrics.observe_request('/solve/batch', status, time.perf_counter() - start)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 # 仅在直接运行此脚本时启动应用
 if __name__ == '__main__':